@@ -5,10 +5,14 @@ from django.conf.urls.defaults import url
 from django.contrib import admin
 
 
+from lizard_wbconfiguration.api.views import InstrumentationStats
 from lizard_wbconfiguration.api.views import RootView
 from lizard_wbconfiguration.api.views import WBSummary
 from lizard_wbconfiguration.api.views import WaterBalanceAreaConfiguration
+from lizard_wbconfiguration.api.views import WaterBalanceAreaConfigurations
 from lizard_wbconfiguration.api.views import WaterBalanceAreaObjectConfiguration
+from lizard_wbconfiguration.api.views import WaterBalanceConfigurationImport
+from lizard_wbconfiguration.instrumentation import instrumented
 
 admin.autodiscover()
 
@@ -20,12 +24,24 @@ urlpatterns = patterns(
         RootView.as_view(),
         name=NAME_PREFIX + 'root'),
     url(r'^area_configuration/$',
-        WaterBalanceAreaConfiguration.as_view(),
+        instrumented(WaterBalanceAreaConfiguration.as_view(),
+                     'area_configuration'),
         name=NAME_PREFIX + 'area_configuration'),
+    url(r'^area_configurations/$',
+        instrumented(WaterBalanceAreaConfigurations.as_view(),
+                     'area_configurations'),
+        name=NAME_PREFIX + 'area_configurations'),
     url(r'^area_object_configuration/$',
-        WaterBalanceAreaObjectConfiguration.as_view(),
+        instrumented(WaterBalanceAreaObjectConfiguration.as_view(),
+                     'area_object_configuration'),
         name=NAME_PREFIX + 'area_object_configuration'),
+    url(r'^import/$',
+        instrumented(WaterBalanceConfigurationImport.as_view(), 'import'),
+        name=NAME_PREFIX + 'import'),
     url(r'^summary/$',
-        WBSummary.as_view(),
+        instrumented(WBSummary.as_view(), 'summary'),
         name=NAME_PREFIX + 'wb_summary'),
+    url(r'^stats/$',
+        InstrumentationStats.as_view(),
+        name=NAME_PREFIX + 'stats'),
     )
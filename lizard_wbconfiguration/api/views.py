@@ -2,22 +2,43 @@
 API views not coupled to models.
 """
 import datetime
+import hashlib
+import operator
 
-from django.http import HttpRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.http import HttpResponseForbidden
+from django.http import HttpResponseNotModified
 from django.core.urlresolvers import reverse
-from django.shortcuts import render_to_response
+from django.template.loader import render_to_string
 from django.utils import simplejson as json
+from django.db import IntegrityError
+from django.db import router
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Sum
 from django.db.models.fields import DateTimeField
-from django.db.models.fields import BooleanField
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
 
+from djangorestframework.parsers import BaseParser
+from djangorestframework.response import Response
 from djangorestframework.views import View
+from lizard_wbconfiguration.caching import cache
+from lizard_wbconfiguration.caching import cached_configuration
+from lizard_wbconfiguration.caching import configuration_keys
+from lizard_wbconfiguration.caching import configuration_version
+from lizard_wbconfiguration.instrumentation import stats
 from lizard_wbconfiguration.models import AreaConfiguration
 from lizard_wbconfiguration.models import AreaGridFieldConfiguration
-from lizard_wbconfiguration.models import BucketsType
 from lizard_wbconfiguration.models import Bucket
 from lizard_wbconfiguration.models import Structure
-from lizard_wbconfiguration.models import StructureInOut
+from lizard_wbconfiguration.models import bulk_saves
+from lizard_wbconfiguration.models import forget_committed_configurations
 from lizard_wbconfiguration import models
+from lizard_wbconfiguration.schema import DATE_FORMAT
+from lizard_wbconfiguration.schema import STARTSEASON_FORMAT
+from lizard_wbconfiguration.schema import write_schema
 
 from lizard_area.models import Area
 
@@ -25,6 +46,61 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+FIELD_ACCESSORS = {}
+
+
+def field_accessors(model):
+    """Return (field name, accessor) of each field of the model.
+
+    An accessor returns the value of the field as the API serializes it,
+    the string of a related object or the value itself. The list is
+    computed once per model.
+    """
+    if model not in FIELD_ACCESSORS:
+        accessors = []
+        for field in model._meta.fields:
+            if field.rel:
+                accessor = lambda obj, name=field.name: str(
+                    getattr(obj, name))
+            else:
+                accessor = operator.attrgetter(field.attname)
+            accessors.append((field.name, accessor))
+        FIELD_ACCESSORS[model] = accessors
+    return FIELD_ACCESSORS[model]
+
+
+CHANGE_TOKEN_FORMAT = '%Y%m%d%H%M%S%f'
+# Objects saved by transactions that were still running when a token was
+# handed out are not missed because the next delta overlaps by this margin.
+CHANGE_TOKEN_MARGIN = datetime.timedelta(seconds=5)
+
+
+def change_token():
+    """Return a token to retrieve the changes from now on."""
+    return (datetime.datetime.now() - CHANGE_TOKEN_MARGIN).strftime(
+        CHANGE_TOKEN_FORMAT)
+
+
+def parse_change_token(token):
+    """Return the datetime of the token, None if token is not valid."""
+    try:
+        return datetime.datetime.strptime(token, CHANGE_TOKEN_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def related_field_names(model):
+    """Return the names of the foreign key fields of the model."""
+    return [field.name for field in model._meta.fields if field.rel]
+
+
+def model_of(obj):
+    """Return the model of obj, also when obj has deferred fields."""
+    if obj._deferred:
+        return obj._meta.proxy_for_model
+    return obj.__class__
+
+
 class RootView(View):
     """
     Startpoint.
@@ -36,13 +112,81 @@ class RootView(View):
             }
 
 
-class WaterBalanceAreaObjectConfiguration(View):
+class InstrumentationStats(View):
+    """
+    Percentiles of the recorded requests per endpoint, for staff only.
+
+    Optional parameters: endpoint, ident (of an area) and by_ident to
+    summarize per endpoint and area.
+    """
+    def get(self, request):
+        if not request.user.is_staff:
+            return HttpResponseForbidden()
+        return stats(request.GET.get('endpoint', None),
+                     request.GET.get('ident', None),
+                     'by_ident' in request.GET)
+
+
+class ConfigurationCacheMixin(object):
+    """
+    Caches the responses of a view per version of the area configuration.
+
+    The version changes on every save or delete of the AreaConfiguration,
+    Bucket or Structure of an area. The responses carry an ETag so clients
+    can revalidate them with If-None-Match.
+    """
+
+    def configuration_etag(self, request, ident):
+        """Return the ETag of the response for the request.
+
+        The ETag depends on the view, the query parameters, the data sets
+        the user is allowed to see and the version of the configuration.
+        """
+        data_set_ids = sorted(getattr(request, 'allowed_data_set_ids', []))
+        etag = hashlib.md5(repr((
+                    self.__class__.__name__,
+                    sorted(request.GET.items()),
+                    data_set_ids,
+                    configuration_version(ident)))).hexdigest()
+        return '"%s"' % etag
+
+    def not_modified(self, request, etag):
+        """Return True if the client has the response of the etag."""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        return etag in [tag.strip() for tag in if_none_match.split(',')]
+
+    def cached_content(self, etag, create_content):
+        """Return the cached content of the etag, create it if needed."""
+        cache_key = 'lizard_wbconfiguration.response.%s' % etag.strip('"')
+        content = cache.get(cache_key)
+        if content is None:
+            content = create_content()
+            cache.set(cache_key, content)
+        return content
+
+    def cached_response(self, request, ident, create_content):
+        """Return a 304 or a response with the (cached) content."""
+        etag = self.configuration_etag(request, ident)
+        if self.not_modified(request, etag):
+            return HttpResponseNotModified()
+        content = self.cached_content(etag, create_content)
+        return Response(status=200, content=content, headers={'ETag': etag})
+
+
+class WaterBalanceAreaObjectConfiguration(ConfigurationCacheMixin, View):
     """
     View and save the area configuration objects.
     Buckets and Structures.
     """
 
     def get(self, request):
+        object_id = request.GET.get('object_id', None)
+        return self.cached_response(
+            request, object_id,
+            lambda: self.areaobjects_configuration(request))
+
+    def areaobjects_configuration(self, request):
+        """Return the buckets or structures of the area."""
         object_id = request.GET.get('object_id', None)
         area_object_type = request.GET.get('area_object_type', None)
         area_object_class = self.areaobject_class(area_object_type)
@@ -50,14 +194,104 @@ class WaterBalanceAreaObjectConfiguration(View):
         if area_object_class is None:
             return {'data': []}
 
-        if area_object_class == Structure:
-            self.create_default_structures(object_id)
+        field_names = self.projected_field_names(
+            area_object_class, request.GET.get('fields', None),
+            request.GET.get('grid_name', None))
+        since = request.GET.get('since', None)
+        if since is None:
+            return {'data': self.cached_areaobjects(
+                    object_id, area_object_class, field_names)}
+
+        version = change_token()
+        area_objects = self.retrieve_areaobjects(
+            object_id, area_object_class, field_names,
+            parse_change_token(since))
+        return {
+            'data': self.areaobject_configuration(
+                [area_object for area_object in area_objects
+                 if not area_object.deleted], field_names),
+            'deleted': [area_object.id for area_object in area_objects
+                        if area_object.deleted],
+            'version': version}
 
+    def retrieve_areaobjects(self, object_id, area_object_class, field_names,
+                             changed_since=None):
+        """Return the buckets or structures of the area.
+
+        Arguments:
+        field_names -- the fields to retrieve, None for all fields
+        changed_since -- retrieve the area objects modified since then,
+        deleted ones included, None for the area objects not deleted
+        """
+        related_names = related_field_names(area_object_class)
         area_objects = area_object_class.objects.filter(
-            area__ident=object_id,
-            deleted=False)
+            area__ident=object_id)
+        if changed_since is None:
+            area_objects = area_objects.filter(deleted=False)
+        else:
+            area_objects = area_objects.filter(modified__gte=changed_since)
+        if field_names is not None:
+            area_objects = area_objects.only(*(field_names + ['deleted']))
+            related_names = [name for name in related_names
+                             if name in field_names]
+        return area_objects.select_related(*related_names)
+
+    def cached_areaobjects(self, object_id, area_object_class,
+                           field_names=None):
+        """Return the (cached) rows of the buckets or structures of the area.
+
+        The rows are cached per area, type of area object and projection
+        until the configuration of the area changes. They are only served
+        for an area configuration the user is allowed to see.
+        """
+        if not AreaConfiguration.objects.filter(ident=object_id).exists():
+            return []
+        projection = 'all'
+        if field_names is not None:
+            projection = hashlib.md5(','.join(field_names)).hexdigest()
+        return cached_configuration(
+            object_id, 'areaobjects.%s.%s' % (
+                area_object_class._meta.module_name, projection),
+            lambda: self.areaobject_rows(object_id, area_object_class,
+                                         field_names))
+
+    def areaobject_rows(self, object_id, area_object_class, field_names):
+        """Return the rows of the buckets or structures of the area."""
+        area_objects = self.retrieve_areaobjects(
+            object_id, area_object_class, field_names)
+        if not area_objects and area_object_class == Structure:
+            # Default structures are created together with the area
+            # configuration, older area configurations may not have
+            # them.
+            if self.create_default_structures(object_id):
+                area_objects = area_objects.all()
+        return self.areaobject_configuration(area_objects, field_names)
+
+    def projected_field_names(self, area_object_class, fields=None,
+                              grid_name=None):
+        """Return the names of the fields to retrieve, None for all fields.
+
+        The fields are passed as comma separated fields parameter, or are
+        the fields configured for the grid passed as grid_name parameter.
+        The id is always included.
+        """
+        if fields:
+            field_names = [name.strip() for name in fields.split(',')]
+        elif grid_name:
+            field_names = [name for name, spec in
+                           AreaGridFieldConfiguration.field_specs(
+                    grid_name, area_object_class)]
+        else:
+            return None
 
-        return {'data': self.areaobject_configuration(list(area_objects))}
+        model_field_names = [field.name for field in
+                             area_object_class._meta.fields]
+        for name in field_names:
+            if name not in model_field_names:
+                logger.debug("Field %s.%s not exists." % (
+                        area_object_class._meta.module_name, name))
+        return ['id'] + [name for name in model_field_names
+                         if name != 'id' and name in field_names]
 
     def areaobject_class(self, area_object_type):
         try:
@@ -73,45 +307,40 @@ class WaterBalanceAreaObjectConfiguration(View):
             logger.debug("UNKNOWN area object type '%s'.", area_object_type)
             return None
 
-    def areaobject_configuration(self, area_objects):
+    def areaobject_configuration(self, area_objects, field_names=None):
         """
         Creates list of dictionaries like
         [{key: value, key: value,},{key: value,},]
+
+        Arguments:
+        area_objects -- the buckets or structures
+        field_names -- the keys to include, None for all fields
         """
         area_object_config = []
+        accessors = None
         for area_object in area_objects:
-            area_object_as_dict = {}
-            for field in area_object._meta.fields:
-                if field.rel:
-                    value = str(getattr(area_object, field.name))
-                else:
-                    value = field.value_from_object(area_object)
-                area_object_as_dict[field.name] = value
-            area_object_config.append(area_object_as_dict)
+            if accessors is None:
+                accessors = [(name, accessor) for name, accessor in
+                             field_accessors(model_of(area_object))
+                             if field_names is None or name in field_names]
+            area_object_config.append(dict(
+                    (name, accessor(area_object))
+                    for name, accessor in accessors))
         return area_object_config
 
     def create_default_structures(self, object_id):
         """
-        Create 10 structures.
+        Create 10 structures, return False when the area
+        configuration does not exist.
         """
-        area_configuration = AreaConfiguration.objects.get(
-            ident=object_id)
+        try:
+            area_configuration = AreaConfiguration.objects.get(
+                ident=object_id)
+        except AreaConfiguration.DoesNotExist:
+            logger.debug("AreaConfiguration '%s' does not exist.", object_id)
+            return False
         area_configuration.create_default_structures()
-
-    def last_areaobject_codenumber(self, area_configuration, areaobject_class):
-        """ Return code number of the last structure. """
-        area_objects = areaobject_class.objects.filter(
-            area__id=area_configuration.id,
-            code__contains=areaobject_class.CODE_DELIMETER)
-        number = None
-        if area_objects.exists():
-            last_areaobject = area_objects.order_by('-id')[0]
-            number = last_areaobject.code_number()
-        return number
-
-    def str2bool(self, value):
-        mapping = {'false': False, 'true': True}
-        return mapping[value.lower()]
+        return True
 
     def retrieve_id(self, record):
         """
@@ -122,119 +351,141 @@ class WaterBalanceAreaObjectConfiguration(View):
             id = record.get('id', None)
             try:
                 return int(id)
-            except ValueError:
+            except (TypeError, ValueError):
                 logger.debug("Area  '%s' is NOT an integer", id)
                 return -1
 
     def delete_areaobjects(self, data, areaobject_class):
-        """Deactivate area objects exclusive computed structures."""
-        success = True
-        try:
-            for record in data:
-                areaobject_id = self.retrieve_id(record)
-                area_objects = areaobject_class.objects.filter(
-                    id=areaobject_id)
-                if not area_objects.exists():
-                    continue
-                area_object = area_objects[0]
-                if type(area_object) == Structure and area_object.is_computed:
-                    continue
-                area_object.deleted = True
-                area_object.save()
-        except:
-                success = False
-        return success
+        """Deactivate area objects exclusive computed structures.
 
-    def create_bucket(self, area):
+        Marks the area objects deleted in one UPDATE. The save signals are
+        sent for every affected area object, so lizard_history logs each
+        of them. Returns a tuple (success, ids of area objects that could
+        not be deleted, deleted area objects).
         """
-        Create a bucket.
+        areaobject_ids = [self.retrieve_id(record) for record in data]
+        area_objects = areaobject_class.objects.filter(
+            id__in=areaobject_ids).select_related('area')
+        if areaobject_class == Structure:
+            area_objects = area_objects.exclude(is_computed=True)
+        area_objects = list(area_objects)
+        found_ids = set(area_object.id for area_object in area_objects)
+        not_deleted = [areaobject_id for areaobject_id in areaobject_ids
+                       if areaobject_id not in found_ids]
+        for areaobject_id in not_deleted:
+            logger.error("%s with id=%s cannot be deleted." % (
+                    areaobject_class._meta.module_name, areaobject_id))
+
+        area_objects = [area_object for area_object in area_objects
+                        if not area_object.deleted]
+        if area_objects:
+            using = router.db_for_write(areaobject_class)
+            modified = datetime.datetime.now()
+            for area_object in area_objects:
+                area_object.deleted = True
+                area_object.modified = modified
+                pre_save.send(sender=areaobject_class, instance=area_object,
+                              raw=False, using=using)
+            areaobject_class.objects.filter(
+                id__in=[area_object.id for area_object in area_objects]
+                ).update(deleted=True, modified=modified)
+            for area_object in area_objects:
+                post_save.send(sender=areaobject_class, instance=area_object,
+                               created=False, raw=False, using=using)
+        return (not not_deleted, not_deleted, area_objects)
+
+    def create_bucket(self, area, number):
+        """
+        Create a bucket with the given code number, without saving it.
         """
         bucket = Bucket(area=area, data_set=area.data_set)
-        last_codenumber = self.last_areaobject_codenumber(
-            area, Bucket)
-        if last_codenumber is None:
-            last_codenumber = bucket.code_number()
-
-        bucket.code = bucket.create_code(last_codenumber + 1)
-        bucket.save()
+        bucket.code = bucket.create_code(number)
         return bucket
 
     def create_buckets(self, data, area):
-        """Create area object."""
+        """Create area object.
+
+        Reserves the code numbers of all buckets at once.
+        """
         touched_objects = []
         success = True
-        for record in data:
+        if not data:
+            return (success, touched_objects)
+        first_number = area.reserve_bucket_numbers(len(data))
+        for number, record in enumerate(data, first_number):
             if 'id' in record.keys():
                 del record['id']
-            bucket = self.create_bucket(area)
-            if bucket is None:
+            bucket = self.create_bucket(area, number)
+            updated, changed = self.set_areaobject_values(record, bucket)
+            if not updated:
                 success = False
-                continue
-            if not self.update_areaobject(record, bucket):
-                success = False
-
+            bucket.save()
             touched_objects.append(bucket)
         return (success, touched_objects)
 
     def update_areaobjects(self, data, areaobject_class):
+        """Update the area objects of the records.
+
+        Retrieves all area objects in one query and saves each
+        changed area object once.
+        """
         touched_objects = []
         success = True
-        for record in data:
-            areaobject_id = self.retrieve_id(record)
-            area_objects = areaobject_class.objects.filter(id=areaobject_id)
-            if not area_objects.exists():
+        areaobject_ids = [self.retrieve_id(record) for record in data]
+        area_objects = areaobject_class.objects.select_related(
+            *related_field_names(areaobject_class)).in_bulk(
+            [areaobject_id for areaobject_id in areaobject_ids
+             if areaobject_id is not None])
+        for record, areaobject_id in zip(data, areaobject_ids):
+            area_object = area_objects.get(areaobject_id)
+            if area_object is None:
                 logger.error("%s with id=%s not exists." % (
                         areaobject_class._meta.module_name, areaobject_id))
                 success = False
                 continue
-            area_object = area_objects[0]
             if not self.update_areaobject(record, area_object):
                 success = False
             touched_objects.append(area_object)
         return (success, touched_objects)
 
     def update_areaobject(self, record, area_object):
-        """Set values into area object.
-        @TODO replace value.split(',')[2] with timeseriescache.id.
+        """Set values into area object, save it once when changed."""
+        success, changed = self.set_areaobject_values(record, area_object)
+        if changed:
+            area_object.save()
+        return success
+
+    def set_areaobject_values(self, record, area_object):
+        """Set values into area object without saving it.
+
+        Returns a tuple (success, changed). The ts_* values are parsed into
+        TimeseriesReferences when the area object is saved.
         """
+        if not hasattr(self, 'related_objects'):
+            self.related_objects = {}
+        schema = write_schema(model_of(area_object))
         success = True
+        changed = False
         for (key, value) in record.items():
-            key = str(key)
-            value = str(value)
-            if value == "" or value == "None":
+            if value is None or value == "" or value == "None":
+                continue
+            if not schema.accepts(key):
+                if key not in schema.read_only:
+                    logger.error("Field %s.%s not exists." % (
+                            area_object._meta.module_name, key))
+                    success = False
                 continue
             try:
-                areaobject_field = area_object._meta.get_field(key)
-            except:
-                logger.error("Field %s.%s not exists." % (
-                        area_object._meta.module_name, key))
+                value = schema.coerce(key, value, self.related_objects)
+            except ValueError as ex:
+                logger.error("Invalid value '%s' for %s.%s: %s" % (
+                        value, area_object._meta.module_name, key, ex))
                 success = False
                 continue
-            if areaobject_field.rel is not None:
-                if areaobject_field.rel.to == BucketsType:
-                    bucket_types = BucketsType.objects.filter(
-                        bucket_type=value)
-                    if not bucket_types.exists():
-                        logger.error("Bucket type %s not exists" % value)
-                        success = False
-                        continue
-                    value = bucket_types[0]
-                elif areaobject_field.rel.to == StructureInOut:
-                    structure_inout = StructureInOut.objects.filter(
-                        code=value)
-                    if not structure_inout.exists():
-                        logger.error("Bucket type %s not exists" % value)
-                        success = False
-                        continue
-                    value = structure_inout[0]
-                else:
-                    logger.error("Undefined relation to %s." % (
-                            areaobject_field.rel.to))
-            if isinstance(areaobject_field, BooleanField):
-                value = self.str2bool(value)
-            setattr(area_object, key, value)
-            area_object.save()
-        return success
+            if getattr(area_object, key) != value:
+                setattr(area_object, key, value)
+                changed = True
+        return (success, changed)
 
     def post(self, request):
         """
@@ -255,29 +506,55 @@ class WaterBalanceAreaObjectConfiguration(View):
 
         areaobject_class = self.areaobject_class(areaobject_type)
         touched_objects = []
+        deleted_objects = []
+        not_deleted = []
 
-        if action == 'delete' and areaobject_class == Bucket:
-            success = self.delete_areaobjects(
-                data, areaobject_class)
-        elif action == 'create' and areaobject_class == Bucket:
-            area = AreaConfiguration.objects.get(ident=object_id)
-            success, touched_objects = self.create_buckets(data, area)
-        elif action == 'update':
-            success, touched_objects = self.update_areaobjects(
-                data, areaobject_class)
-        else:
-            logger.error("UKNOWN post action '%s'." % action)
-            success = False
+        try:
+            with transaction.commit_on_success():
+                with bulk_saves():
+                    if action == 'delete' and areaobject_class == Bucket:
+                        success, not_deleted, deleted_objects = \
+                            self.delete_areaobjects(data, areaobject_class)
+                    elif action == 'create' and areaobject_class == Bucket:
+                        area = AreaConfiguration.objects.get(
+                            ident=object_id)
+                        success, touched_objects = self.create_buckets(
+                            data, area)
+                    elif action == 'update':
+                        success, touched_objects = self.update_areaobjects(
+                            data, areaobject_class)
+                    else:
+                        logger.error("UKNOWN post action '%s'." % action)
+                        success = False
+        except IntegrityError as ex:
+            # Codes are unique per area, nothing of the request is saved.
+            message = "The code of a %s is unique per area." % (
+                areaobject_class._meta.module_name)
+            logger.error("%s %s" % (message, ','.join(map(str, ex.args))))
+            return Response(status=409, content={
+                    'success': False, 'message': message, 'data': [],
+                    'not_deleted': []})
+        forget_committed_configurations(
+            [area_object.area.ident
+             for area_object in touched_objects + deleted_objects])
 
         return {'success': success,
-                'data': self.areaobject_configuration(touched_objects)}
+                'data': self.areaobject_configuration(touched_objects),
+                'not_deleted': not_deleted}
 
 
-class WaterBalanceAreaConfiguration(View):
+class WaterBalanceAreaConfiguration(ConfigurationCacheMixin, View):
     """
     Area configuration.
     """
     def get(self, request):
+        ident = request.GET.get('object_id', None)
+        return self.cached_response(
+            request, ident,
+            lambda: self.grid_configuration(request))
+
+    def grid_configuration(self, request):
+        """Return the area configuration as rows of the requested grid."""
         ident = request.GET.get('object_id', None)
         area_configs = AreaConfiguration.objects.filter(ident=ident)
         if area_configs.exists():
@@ -285,7 +562,23 @@ class WaterBalanceAreaConfiguration(View):
         else:
             area_config = WaterBalanceAreaConfiguration.create(ident)
         grid_name = request.GET.get('grid_name', None)
-        return self.area_configuration(area_config, grid_name)
+        since = request.GET.get('since', None)
+        if since is None:
+            return self.cached_area_configuration(area_config, grid_name)
+
+        version = change_token()
+        changed_since = parse_change_token(since)
+        if changed_since is not None and area_config.modified < changed_since:
+            data = []
+        else:
+            data = self.area_configuration(area_config, grid_name)
+        return {'data': data, 'version': version}
+
+    def cached_area_configuration(self, area, grid_name):
+        """Return the (cached) rows of the grid of the area configuration."""
+        return cached_configuration(
+            area.ident, 'grid.%s' % str(grid_name).lower(),
+            lambda: self.area_configuration(area, grid_name))
 
     def area_configuration(self, area, grid_name):
         """
@@ -295,20 +588,18 @@ class WaterBalanceAreaConfiguration(View):
         area -- the area configuration object.
         grid_name -- the name of the table.
         """
+        fields = dict((field.name, field) for field in area._meta.fields)
         area_config = []
-        for field in area._meta.fields:
-            grid_field = AreaGridFieldConfiguration.objects.filter(
-                field_name__field_name=field.name,
-                grid__name__iexact=grid_name)
-            if grid_field.exists():
-                value = self.retrieve_value(area, field)
-                area_config.append(
-                    {'id': field.name,
-                     'property': grid_field[0].display_name,
-                     'value': value,
-                     'editable': grid_field[0].editable,
-                     'ts_parameter': grid_field[0].ts_parameter,
-                     'type': grid_field[0].field_type})
+        for field_name, spec in AreaGridFieldConfiguration.field_specs(
+            grid_name, AreaConfiguration):
+            value = self.retrieve_value(area, fields[field_name])
+            area_config.append(
+                {'id': field_name,
+                 'property': spec['property'],
+                 'value': value,
+                 'editable': spec['editable'],
+                 'ts_parameter': spec['ts_parameter'],
+                 'type': spec['type']})
         return area_config
 
     def retrieve_value(self, area, field):
@@ -318,22 +609,24 @@ class WaterBalanceAreaConfiguration(View):
         area -- the object of AreaConfiguration
         field -- the object type field with respect to area
         """
+        if field.rel is not None and field.rel.to == Area:
+            # Avoid retrieving the Area itself.
+            if getattr(area, field.attname) is not None:
+                return area.id
+            return None
+
         value = getattr(area, field.name)
         if value is None:
             return value
 
         if field.rel is not None:
-            if field.rel.to == Area:
-                if value is not None:
-                    value = area.id
-            else:
-                logger.debug("Unexpected foreign key by %s.%s to %s." % (
-                        area._meta.module_name,
-                        field.name,
-                        field.rel.to._meta.module_name))
+            logger.debug("Unexpected foreign key by %s.%s to %s." % (
+                    area._meta.module_name,
+                    field.name,
+                    field.rel.to._meta.module_name))
         if isinstance(field, DateTimeField):
             if field.name == 'start_dt':
-                value = value.strftime(self.startdate_format())
+                value = value.strftime(self.date_format())
             else:
                 value = value.strftime(self.startseason_format())
         return value
@@ -385,28 +678,28 @@ class WaterBalanceAreaConfiguration(View):
             data = [data]
 
         area_config = AreaConfiguration.objects.get(ident=object_id)
+        schema = write_schema(AreaConfiguration)
 
         for field in data:
-            field_name = str(field['id'])
-            value = str(field['value'])
+            field_name = field['id']
+            value = field['value']
+
+            if not schema.accepts(field_name):
+                if field_name not in schema.read_only:
+                    logger.debug("Field '%s.%s' is NOT exists." % (
+                          area_config._meta.module_name, field_name))
+                continue
 
-            if field_name == 'id':
+            if value is None or value == "" or value == "None":
+                if field_name in schema.nullable:
+                    setattr(area_config, field_name, None)
                 continue
             try:
-                areaconfig_field = area_config._meta.get_field(field_name)
-            except:
-                logger.debug("Field '%s.%s' is NOT exists." % (
-                      area_config._meta.module_name, field_name))
+                value = schema.coerce(field_name, value)
+            except ValueError as ex:
+                logger.debug("Invalid value '%s' for '%s.%s': %s" % (
+                        value, area_config._meta.module_name, field_name, ex))
                 continue
-
-            if areaconfig_field.rel:
-                if areaconfig_field.rel.to == Area:
-                    continue
-
-            if isinstance(areaconfig_field, DateTimeField):
-                value = self.datetimefield_value(areaconfig_field, value)
-                if value is None:
-                    continue
             setattr(area_config, field_name, value)
 
         try:
@@ -415,60 +708,389 @@ class WaterBalanceAreaConfiguration(View):
             logger.error("Could not save wb-configuration for %s" % object_id)
             logger.error(','.join(map(str, ex.args)))
             return {'success': False}
+        forget_committed_configurations([area_config.ident])
 
         return {'success': True}
 
-    def datetimefield_value(self, field, value):
-        val = None
-        try:
-            if field.name == 'start_dt':
-                val = datetime.datetime.strptime(
-                    value, self.date_format())
-            else:
-                curr_year = datetime.datetime.today().year
-                val = datetime.datetime.strptime(
-                    "%s/%s" % (value, curr_year),
-                    self.date_format())
-        except ValueError as ex:
-            logger.debug(','.join(map(str, ex.args)))
-        except TypeError as ex:
-            logger.debug(','.join(map(str, ex.args)))
-        except Exception as ex:
-            logger.debug(','.join(map(str, ex.args)))
-
-        return val
-
     def date_format(self):
-        return "%d/%m/%Y"
+        return DATE_FORMAT
 
     def startseason_format(self):
-        return "%d/%m"
+        return STARTSEASON_FORMAT
 
 
-class WBSummary(View):
+class WBSummary(ConfigurationCacheMixin, View):
 
     """
     WB configuration summary.
     """
     def get(self, request):
         object_id = request.GET.get('object_id', None)
-        areaconfigurations = AreaConfiguration.objects.filter(ident=object_id)
-        context = {}
-        if areaconfigurations.exists():
-            buckets = Bucket.objects.filter(area=areaconfigurations[0])
-            structures_in = Structure.objects.filter(
-                area=areaconfigurations[0],
-                in_out__code='in')
-            structures_out = Structure.objects.filter(
-                area=areaconfigurations[0],
-                in_out__code='uit')
+        etag = self.configuration_etag(request, object_id)
+        if self.not_modified(request, etag):
+            return HttpResponseNotModified()
+        response = HttpResponse(self.cached_content(
+                etag, lambda: self.summary(request)))
+        response['ETag'] = etag
+        return response
+
+    def summary(self, request):
+        """Return the summary as html."""
+        object_id = request.GET.get('object_id', None)
+        areaconfigurations = list(
+            AreaConfiguration.objects.filter(ident=object_id)[:1])
+        if not areaconfigurations:
+            return render_to_string('wbconfiguration_summary.html', {})
+        areaconfiguration = areaconfigurations[0]
+        return self.cached_summary(areaconfiguration)
+
+    def cached_summary(self, areaconfiguration):
+        """Return the (cached) summary of the area configuration."""
+        return cached_configuration(
+            areaconfiguration.ident, 'summary',
+            lambda: self.area_summary(areaconfiguration))
+
+    def area_summary(self, areaconfiguration):
+        """Return the summary of the area configuration as html."""
+        buckets = Bucket.objects.filter(area=areaconfiguration, deleted=False)
+        structures = Structure.objects.filter(
+            area=areaconfiguration, deleted=False,
+            in_out__code__in=('in', 'uit')).select_related('in_out')
+        bucket_types = buckets.values(
+            'bucket_type__bucket_type').annotate(
+            count=Count('id'),
+            surface=Sum('surface')).order_by('bucket_type__bucket_type')
+
+        context = {'areaconfiguration': areaconfiguration,
+                   'buckets': buckets.select_related('bucket_type'),
+                   'bucket_types': bucket_types,
+                   'structures_in': [structure for structure in structures
+                                     if structure.in_out.code == 'in'],
+                   'structures_out': [structure for structure in structures
+                                      if structure.in_out.code == 'uit']}
+        return render_to_string('wbconfiguration_summary.html', context)
+
+
+class WaterBalanceAreaConfigurations(View):
+    """
+    Area configurations, buckets and structures of many areas at once.
+
+    Expects either object_ids, a comma separated list of area idents, or
+    data_set, the name of a data set. The areas that are not cached are
+    retrieved in chunks, with a fixed number of queries per chunk, and
+    streamed as JSON like:
+    {"data": [{"ident": ..., "area_configuration": {...},
+    "buckets": [...], "structures": [...]},]}
+    """
+    chunk_size = 100
+
+    def get(self, request):
+        area_configurations = AreaConfiguration.objects.all()
+        object_ids = request.GET.get('object_ids', None)
+        data_set = request.GET.get('data_set', None)
+        if object_ids is not None:
+            area_configurations = area_configurations.filter(
+                ident__in=[ident.strip() for ident in object_ids.split(',')])
+        elif data_set is not None:
+            area_configurations = area_configurations.filter(
+                data_set__name__iexact=data_set)
+        else:
+            area_configurations = area_configurations.none()
+
+        areas = list(area_configurations.order_by('ident').values_list(
+                'id', 'ident'))
+        # The querysets are created here, while the request is still
+        # available to filter the data sets.
+        chunks = []
+        for start in range(0, len(areas), self.chunk_size):
+            chunk = areas[start:start + self.chunk_size]
+            area_ids = [area_id for area_id, ident in chunk]
+            chunks.append((
+                    chunk,
+                    AreaConfiguration.objects.filter(
+                        id__in=area_ids).select_related(
+                        *related_field_names(AreaConfiguration)),
+                    Bucket.objects.filter(
+                        area__in=area_ids, deleted=False).select_related(
+                        *related_field_names(Bucket)),
+                    Structure.objects.filter(
+                        area__in=area_ids, deleted=False).select_related(
+                        *related_field_names(Structure))))
+        data_sets = hashlib.md5(repr(sorted(
+                    getattr(request, 'allowed_data_set_ids', [])))).hexdigest()
+        return HttpResponse(self.stream(chunks, data_sets),
+                            mimetype='application/json')
+
+    def serialize(self, area_object):
+        return dict((name, accessor(area_object)) for name, accessor in
+                    field_accessors(area_object.__class__))
+
+    def serialize_chunk(self, area_ids, area_configurations, buckets,
+                        structures):
+        """Return a dict of the serialized configuration per area id."""
+        area_buckets = {}
+        for bucket in buckets.filter(area__in=area_ids):
+            area_buckets.setdefault(bucket.area_id, []).append(
+                self.serialize(bucket))
+        area_structures = {}
+        for structure in structures.filter(area__in=area_ids):
+            area_structures.setdefault(structure.area_id, []).append(
+                self.serialize(structure))
+        return dict((area_configuration.id, {
+                    'ident': area_configuration.ident,
+                    'area_configuration': self.serialize(area_configuration),
+                    'buckets': area_buckets.get(area_configuration.id, []),
+                    'structures': area_structures.get(
+                        area_configuration.id, [])})
+                    for area_configuration in area_configurations.filter(
+                id__in=area_ids))
+
+    def stream(self, chunks, data_sets):
+        """Yield the configurations of the chunks as JSON.
+
+        The serialized configuration of an area is cached per allowed
+        data sets until it changes, only the areas that are not cached are
+        retrieved.
+        """
+        encoder = DjangoJSONEncoder()
+        yield '{"data": ['
+        separator = ''
+        for chunk, area_configurations, buckets, structures in chunks:
+            keys = configuration_keys(
+                [ident for area_id, ident in chunk], 'serialized', data_sets)
+            cached = cache.get_many(keys.values())
+            missing = [area_id for area_id, ident in chunk
+                       if keys[ident] not in cached]
+            if missing:
+                serialized = self.serialize_chunk(
+                    missing, area_configurations, buckets, structures)
+                new = dict((keys[ident], serialized[area_id])
+                           for area_id, ident in chunk
+                           if area_id in serialized)
+                cache.set_many(new)
+                cached.update(new)
+            for area_id, ident in chunk:
+                if keys[ident] in cached:
+                    yield separator + encoder.encode(cached[keys[ident]])
+                    separator = ','
+        yield ']}'
+
+
+class NDJSONParser(BaseParser):
+    """
+    Passes newline-delimited JSON through as the unread stream.
+
+    The lines are parsed by the view, so the body is never held in memory
+    as a whole.
+    """
+    media_type = 'application/x-ndjson'
+    media_types = ('application/x-ndjson', 'text/plain')
 
-            context = {'areaconfiguration': areaconfigurations[0],
-                       'buckets': buckets,
-                       'structures_in': structures_in,
-                       'structures_out': structures_out}
+    def can_handle_request(self, content_type):
+        return content_type.split(';')[0].strip().lower() in self.media_types
 
-        return render_to_response('wbconfiguration_summary.html', context)
+    def parse(self, stream):
+        return (stream, None)
+
+
+class WaterBalanceConfigurationImport(View):
+    """
+    Import the configurations of many areas at once.
+
+    Expects newline-delimited JSON, one area per line, like:
+    {"ident": "2100", "area_configuration": {"kwel": "0.5", ...},
+    "buckets": [{"code": "2100_GW1", "surface": "100.0", ...},],
+    "structures": [{"code": "2100_inlaat1", ...},]}
+    as content type application/x-ndjson or text/plain. Buckets without
+    code get a new code. The body is read line by line and each chunk of
+    areas is imported in its own transaction. Returns the result per area.
+    """
+    chunk_size = 50
+    parsers = (NDJSONParser, )
+
+    def post(self, request):
+        data_set_id = WaterBalanceAreaConfiguration().allowed_data_set_id(
+            request)
+        if data_set_id is None:
+            logger.debug("User %s is not allowed to maintain data sets.",
+                         request.user.username)
+            return {'success': False, 'data': []}
+
+        results = []
+        chunk = []
+        for line in self.DATA or []:
+            if not line.strip():
+                continue
+            chunk.append(line)
+            if len(chunk) == self.chunk_size:
+                results.extend(self.import_chunk(chunk))
+                chunk = []
+        if chunk:
+            results.extend(self.import_chunk(chunk))
+        return {'success': all(result['success'] for result in results),
+                'data': results}
+
+    def import_chunk(self, lines):
+        """Import the areas of the lines in one transaction."""
+        configurations = []
+        results = []
+        for line in lines:
+            try:
+                configuration = json.loads(line)
+                result = {'ident': configuration['ident']}
+                configurations.append((configuration, result))
+            except (ValueError, KeyError, TypeError):
+                logger.error("Invalid configuration '%s'." % line[:128])
+                result = {'ident': None, 'success': False,
+                          'error': 'Invalid configuration.'}
+            results.append(result)
+        try:
+            with transaction.commit_on_success():
+                with bulk_saves():
+                    for configuration, result in configurations:
+                        result.update(self.import_area(configuration))
+        except Exception as ex:
+            logger.error("Could not import chunk: %s" % (
+                    ','.join(map(str, ex.args))))
+            for configuration, result in configurations:
+                result.update({'success': False, 'error': str(ex),
+                               'buckets': 0, 'structures': 0})
+        else:
+            forget_committed_configurations(
+                [result['ident'] for configuration, result in configurations])
+        return results
+
+    def import_area(self, configuration):
+        """Import the configuration of one area, return the result."""
+        ident = configuration['ident']
+        try:
+            area_config = AreaConfiguration.objects.get(ident=ident)
+        except AreaConfiguration.DoesNotExist:
+            area_config = WaterBalanceAreaConfiguration.create(ident)
+        if area_config is None:
+            return {'success': False, 'error': 'Area does not exist.'}
+
+        object_view = WaterBalanceAreaObjectConfiguration()
+        success = self.set_areaconfiguration_values(
+            configuration.get('area_configuration', {}), area_config)
+        area_config.save()
+
+        buckets_success, buckets = self.import_areaobjects(
+            object_view, area_config, Bucket,
+            configuration.get('buckets', []))
+        structures_success, structures = self.import_areaobjects(
+            object_view, area_config, Structure,
+            configuration.get('structures', []))
+        return {'success': success and buckets_success and structures_success,
+                'buckets': buckets,
+                'structures': structures}
+
+    def set_areaconfiguration_values(self, values, area_config):
+        schema = write_schema(AreaConfiguration)
+        success = True
+        for field_name, value in values.items():
+            if not schema.accepts(field_name):
+                if field_name not in schema.read_only:
+                    logger.error("Field '%s.%s' is NOT exists." % (
+                            area_config._meta.module_name, field_name))
+                    success = False
+                continue
+            if value is None or value == "" or value == "None":
+                if field_name in schema.nullable:
+                    setattr(area_config, field_name, None)
+                continue
+            try:
+                setattr(area_config, field_name,
+                        schema.coerce(field_name, value))
+            except ValueError as ex:
+                logger.error("Invalid value '%s' for '%s.%s': %s" % (
+                        value, area_config._meta.module_name, field_name, ex))
+                success = False
+        return success
+
+    def import_areaobjects(self, object_view, area_config, areaobject_class,
+                           records):
+        """Create or update the area objects of the records by code.
+
+        Returns a tuple (success, number of saved area objects).
+        """
+        codes = [record.get('code') for record in records
+                 if record.get('code')]
+        area_objects = dict(
+            (area_object.code, area_object) for area_object in
+            areaobject_class.objects.filter(area=area_config, code__in=codes))
+        without_code = [record for record in records if not record.get('code')]
+        if without_code and areaobject_class == Bucket:
+            number = area_config.reserve_bucket_numbers(len(without_code))
+            for record in without_code:
+                record['code'] = Bucket(area=area_config).create_code(number)
+                number += 1
+
+        success = True
+        saved = 0
+        for record in records:
+            code = record.get('code')
+            if not code:
+                logger.error("%s without code in '%s'." % (
+                        areaobject_class._meta.module_name, area_config.ident))
+                success = False
+                continue
+            area_object = area_objects.get(code)
+            if area_object is None:
+                area_object = areaobject_class(
+                    code=code, area=area_config,
+                    data_set=area_config.data_set)
+                if areaobject_class == Bucket:
+                    try:
+                        area_config.claim_bucket_number(
+                            area_object.code_number())
+                    except ValueError:
+                        logger.warning("Bucket code '%s' has no number." % (
+                                code))
+            updated, changed = object_view.set_areaobject_values(
+                record, area_object)
+            if not updated:
+                success = False
+            if changed or area_object.id is None:
+                area_object.save()
+                saved += 1
+        return (success, saved)
+
+
+def configuration_snapshot(area_configuration):
+    """Return the configuration of the area as shown by the API views.
+
+    The result has the four sections 'water' and 'area' (the grids of the
+    area configuration), 'bucket' and 'structure', like the responses of
+    WaterBalanceAreaConfiguration and WaterBalanceAreaObjectConfiguration.
+    The buckets and structures are retrieved once, the grid specs come
+    from the cache.
+    """
+    grid_view = WaterBalanceAreaConfiguration()
+    object_view = WaterBalanceAreaObjectConfiguration()
+    buckets = Bucket.objects.filter(
+        area=area_configuration, deleted=False).select_related(
+        *related_field_names(Bucket))
+    structures = Structure.objects.filter(
+        area=area_configuration, deleted=False).select_related(
+        *related_field_names(Structure))
+    if not structures:
+        area_configuration.create_default_structures()
+        structures = structures.all()
+    return {
+        'water': grid_view.area_configuration(area_configuration, 'water'),
+        'area': grid_view.area_configuration(area_configuration, 'area'),
+        'bucket': {'data': object_view.areaobject_configuration(buckets)},
+        'structure': {
+            'data': object_view.areaobject_configuration(structures)},
+        }
+
+
+def cached_configuration_snapshot(area_configuration):
+    """Return the configuration_snapshot, cached until it changes."""
+    return cached_configuration(
+        area_configuration.ident, 'configuration_snapshot',
+        lambda: configuration_snapshot(area_configuration))
 
 
 class HistoryObjectView(View):
@@ -476,9 +1098,6 @@ class HistoryObjectView(View):
     View not actually to be viewed from the client, but to be called
     by lizard-history to gather the current status of the waterbalance
     configuration.
-
-    Note that whoever instantiates this view should add the user as attribute
-    on it, because get_object_for_api depends on that.
     """
 
     def get_object_for_api(self, obj, include_geom, flat):
@@ -488,36 +1107,8 @@ class HistoryObjectView(View):
         The parameters include_geom and flat are not actually used,
         but are present because lizard_history works that way.
         """
-        result = {}
-
-        # Our views expects a request, so let's make one.
-        view_request = HttpRequest()
-        view_request.user = self.user
-        view_request.GET = view_request.GET.copy()  # Make request mutable.
-        view_request.GET.update(
-            object_id=obj.area.area.ident,
-            grid_name='water',
-        )
-        result.update(
-            water=WaterBalanceAreaConfiguration().get(view_request)
-        )
-
-        view_request.GET.update(
-            grid_name='area',
-        )
-        result.update(
-            area=WaterBalanceAreaConfiguration().get(view_request)
-        )
-
-        del view_request.GET['grid_name']
-        view_request.GET.update(area_object_type='Bucket')
-        result.update(
-            bucket=WaterBalanceAreaObjectConfiguration().get(view_request)
-        )
-
-        view_request.GET.update(area_object_type='Structure')
-        result.update(
-            structure=WaterBalanceAreaObjectConfiguration().get(view_request)
-        )
-
-        return result
+        if isinstance(obj, AreaConfiguration):
+            area_configuration = obj
+        else:
+            area_configuration = obj.area
+        return cached_configuration_snapshot(area_configuration)
@@ -0,0 +1,274 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Benchmarks of the import, the export, the api and the lookups they do most.
+
+Run them on synthetic configurations, see lizard_wbconfiguration.synthetic,
+with 'bin/django wbconfiguration_benchmark'. Every measurement has the wall
+time and the number of queries, the results of a run can be stored as JSON
+to compare versions.
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+import pkg_resources
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db import reset_queries
+from django.test.client import RequestFactory
+from django.utils import simplejson as json
+
+from lizard_security.models import DataSet
+
+from lizard_wbconfiguration.api.views import WBSummary
+from lizard_wbconfiguration.api.views import WaterBalanceAreaConfiguration
+from lizard_wbconfiguration.api.views import WaterBalanceAreaConfigurations
+from lizard_wbconfiguration.api.views import \
+    WaterBalanceAreaObjectConfiguration
+from lizard_wbconfiguration.caching import bump_configuration_versions
+from lizard_wbconfiguration.export_dbf import DBFExporter
+from lizard_wbconfiguration.import_dbf import DBFImporter
+from lizard_wbconfiguration.models import AreaConfiguration
+from lizard_wbconfiguration.models import Bucket
+from lizard_wbconfiguration.models import Structure
+from lizard_wbconfiguration.synthetic import DBF_FILENAMES
+from lizard_wbconfiguration.synthetic import create_synthetic_configurations
+from lizard_wbconfiguration.synthetic import create_synthetic_dbf_mapping
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkError(Exception):
+    """A measured step did not succeed, its timing is meaningless."""
+
+
+def timed(function, *args, **kwargs):
+    """Return the wall time in seconds of calling the function."""
+    start = time.time()
+    function(*args, **kwargs)
+    return time.time() - start
+
+
+def recorded_queries(function, *args, **kwargs):
+    """Return the wall time and the SQL of the queries of the function."""
+    use_debug_cursor = connection.use_debug_cursor
+    connection.use_debug_cursor = True
+    reset_queries()
+    try:
+        seconds = timed(function, *args, **kwargs)
+        queries = [query['sql'] for query in connection.queries]
+    finally:
+        connection.use_debug_cursor = use_debug_cursor
+        reset_queries()
+    return seconds, queries
+
+
+def measure(name, function, *args, **kwargs):
+    """Return the wall time and the number of queries of the function."""
+    seconds, queries = recorded_queries(function, *args, **kwargs)
+    logger.info("%s: %.3f s, %d queries.", name, seconds, len(queries))
+    return {'name': name, 'seconds': seconds, 'queries': len(queries)}
+
+
+def import_lookups(area_configurations):
+    """Look up every area object by code, as the dbf import does."""
+    for area_configuration in area_configurations:
+        for model in (Bucket, Structure):
+            codes = model.objects.filter(
+                area=area_configuration).values_list('code', flat=True)
+            for code in list(codes):
+                model.objects.select_related('area').get(code=code)
+
+
+def listing_lookups(area_configurations):
+    """List the area objects of every area, as the api does."""
+    for area_configuration in area_configurations:
+        for model in (Bucket, Structure):
+            list(model.objects.filter(area=area_configuration,
+                                      deleted=False))
+
+
+def data_set_lookups(area_configurations):
+    """List the configurations of the data sets of the areas."""
+    data_sets = set(area_configuration.data_set_id
+                    for area_configuration in area_configurations)
+    for data_set in data_sets:
+        list(AreaConfiguration.objects.filter(data_set=data_set))
+        list(Bucket.objects.filter(data_set=data_set))
+        list(Structure.objects.filter(data_set=data_set))
+
+
+LOOKUPS = (
+    ('import', import_lookups),
+    ('listing', listing_lookups),
+    ('data_set', data_set_lookups),
+)
+
+
+class AreaValidation(object):
+    """The area of a configuration to validate, as the importer uses it."""
+
+    def __init__(self, area):
+        self.area = area
+
+
+class Benchmark(object):
+    """
+    Measures the import, export and api of synthetic configurations.
+
+    Creates the configurations of number_of_areas areas in a new data set,
+    exports them to dbf files in a temporary directory and imports these
+    files again. The measurements are collected in self.results.
+    """
+
+    def __init__(self, number_of_areas, buckets_per_area=8, sample_size=10,
+                 prefix='benchmark'):
+        self.number_of_areas = number_of_areas
+        self.buckets_per_area = buckets_per_area
+        self.sample_size = sample_size
+        self.prefix = "%s_%d" % (prefix, number_of_areas)
+        self.results = []
+        self.request_factory = RequestFactory()
+
+    def measure(self, name, function, *args, **kwargs):
+        self.results.append(measure(name, function, *args, **kwargs))
+
+    def run(self):
+        """Run all measurements, return the results."""
+        self.directory = tempfile.mkdtemp(prefix=self.prefix)
+        try:
+            self.data_set = DataSet.objects.create(name=self.prefix)
+            create_synthetic_dbf_mapping()
+            self.measure('create', self.create)
+            self.sample = self.area_configurations[:self.sample_size]
+            self.measure_export()
+            self.measure_import()
+            for name, lookups in LOOKUPS:
+                self.measure('lookups.%s' % name, lookups, self.sample)
+            self.measure_api()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return self.results
+
+    def create(self):
+        self.area_configurations = create_synthetic_configurations(
+            self.number_of_areas, self.buckets_per_area, self.data_set,
+            self.prefix)
+
+    def dbf_path(self, model_name):
+        return os.path.join(self.directory,
+                            "%s.dbf" % DBF_FILENAMES[model_name])
+
+    def measure_export(self):
+        exporter = DBFExporter()
+        for name, export in (
+            ('AreaConfiguration', exporter.export_areaconfiguration),
+            ('Bucket', exporter.export_bucketconfiguration),
+            ('Structure', exporter.export_structureconfiguration),
+            ('Area', exporter.export_aanafvoergebieden)):
+            self.measure('export.%s' % name, export, self.data_set,
+                         self.directory, DBF_FILENAMES[name])
+
+    def importer(self):
+        importer = DBFImporter()
+        importer.fews_meta_info = self.prefix
+        importer.areas_filepath = self.dbf_path('AreaConfiguration')
+        importer.buckets_filepath = self.dbf_path('Bucket')
+        importer.structures_filepath = self.dbf_path('Structure')
+        return importer
+
+    def measure_import(self):
+        self.measure('import_dbf', self.importer().import_dbf)
+        self.measure('validate', self.validate)
+
+    def validate(self):
+        """Import the sample areas one by one, as the validation does."""
+        importer = self.importer()
+        for area_configuration in self.sample:
+            validation = AreaValidation(area_configuration.area)
+            importer.import_areaconfigurations('AreaConfiguration',
+                                               validation)
+            importer.import_buckets('Bucket', validation)
+            importer.import_structures('Structure', validation)
+
+    def request(self, method, path='/', data=None):
+        """Return a request of a superuser allowed to see the data set."""
+        if method == 'get':
+            request = self.request_factory.get(path, data or {})
+        else:
+            request = self.request_factory.post(path, data or {})
+        request.user, created = User.objects.get_or_create(
+            username=self.prefix, defaults={'is_superuser': True})
+        request.allowed_data_set_ids = [self.data_set.id]
+        request._dont_enforce_csrf_checks = True
+        return request
+
+    def call_view(self, view, requests):
+        """Call the view with the requests and read the responses.
+
+        Raises BenchmarkError when a response is not a 200.
+        """
+        for request in requests:
+            response = view(request)
+            if response.status_code != 200:
+                raise BenchmarkError("%s %s returned %d: %s" % (
+                        request.method, request.get_full_path(),
+                        response.status_code, response.content[:256]))
+            response.content
+
+    def measure_api(self):
+        idents = [area_configuration.ident
+                  for area_configuration in self.sample]
+        area_view = WaterBalanceAreaConfiguration.as_view()
+        object_view = WaterBalanceAreaObjectConfiguration.as_view()
+        gets = (
+            ('area_configuration', area_view, [
+                    {'object_id': ident, 'grid_name': grid_name}
+                    for ident in idents for grid_name in ('water', 'area')]),
+            ('area_object_configuration', object_view, [
+                    {'object_id': ident, 'area_object_type': object_type}
+                    for ident in idents
+                    for object_type in ('Bucket', 'Structure')]),
+            ('summary', WBSummary.as_view(), [
+                    {'object_id': ident} for ident in idents]),
+            ('area_configurations', WaterBalanceAreaConfigurations.as_view(),
+             [{'data_set': self.data_set.name}]),
+        )
+        for state in ('cold', 'warm'):
+            if state == 'cold':
+                bump_configuration_versions(idents)
+            for name, view, data in gets:
+                self.measure(
+                    'api.%s.get.%s' % (name, state), self.call_view, view,
+                    [self.request('get', data=item) for item in data])
+
+        buckets = Bucket.objects.filter(
+            area__in=self.sample).values_list('id', flat=True)
+        self.measure(
+            'api.area_object_configuration.post', self.call_view,
+            object_view, [self.request(
+                    'post', '/?action=update',
+                    {'area_object_type': 'Bucket',
+                     'data': json.dumps([{'id': bucket_id, 'surface': '42.0'}
+                                         for bucket_id in buckets])})])
+        self.measure(
+            'api.area_configuration.post', self.call_view, area_view,
+            [self.request(
+                    'post', data={'object_id': ident,
+                                  'data': json.dumps([
+                                {'id': 'kwel', 'value': '0.25'}])})
+                     for ident in idents])
+
+
+def benchmark_header():
+    """Return what the results of a run depend on."""
+    return {
+        'version': pkg_resources.get_distribution(
+            'lizard-wbconfiguration').version,
+        'date': datetime.datetime.now().isoformat(),
+        'database': connection.vendor,
+    }
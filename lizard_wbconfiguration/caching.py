@@ -0,0 +1,97 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Versioned cache keys.
+
+Cached values are stored under a key that contains a version. Bumping the
+version invalidates all values stored under the old version at once.
+
+The values are stored in the cache LIZARD_WBCONFIGURATION_CACHE of the
+CACHES setting, 'default' by default. Use a cache all processes share, like
+memcached, to share the cached configurations between the web and celery
+workers.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import get_cache
+
+cache = get_cache(getattr(settings, 'LIZARD_WBCONFIGURATION_CACHE',
+                          'default'))
+
+# Versions should outlive the values stored under them.
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+GRID_FIELDS_VERSION_KEY = 'lizard_wbconfiguration.grid_fields.version'
+
+
+def get_version(version_key):
+    """Return the current version stored under version_key."""
+    version = cache.get(version_key)
+    if version is None:
+        version = bump_version(version_key)
+    return version
+
+
+def bump_version(version_key):
+    """Store and return a new version under version_key."""
+    version = uuid.uuid4().hex
+    cache.set(version_key, version, VERSION_TIMEOUT)
+    return version
+
+
+def versioned_key(version_key, *parts):
+    """Return a cache key for parts under the current version."""
+    return '.'.join([version_key, get_version(version_key)] +
+                    [str(part) for part in parts])
+
+
+CONFIGURATION_VERSION_KEY = 'lizard_wbconfiguration.configuration.version.%s'
+
+
+def configuration_version(ident):
+    """Return the version of the configuration of the area ident."""
+    return get_version(CONFIGURATION_VERSION_KEY % ident)
+
+
+def bump_configuration_version(ident):
+    """Invalidate everything cached for the configuration of area ident."""
+    return bump_version(CONFIGURATION_VERSION_KEY % ident)
+
+
+def bump_configuration_versions(idents):
+    """Invalidate everything cached for the configurations of many areas."""
+    cache.set_many(dict((CONFIGURATION_VERSION_KEY % ident, uuid.uuid4().hex)
+                        for ident in idents), VERSION_TIMEOUT)
+
+
+def configuration_keys(idents, *parts):
+    """Return a dict of the cache key of parts per area ident.
+
+    Retrieves the versions of all areas at once.
+    """
+    version_keys = dict((ident, CONFIGURATION_VERSION_KEY % ident)
+                        for ident in idents)
+    versions = cache.get_many(version_keys.values())
+    keys = {}
+    for ident, version_key in version_keys.items():
+        version = versions.get(version_key)
+        if version is None:
+            version = bump_version(version_key)
+        keys[ident] = '.'.join([version_key, version] +
+                               [str(part) for part in parts])
+    return keys
+
+
+def cached_configuration(ident, name, create):
+    """Return the value name cached for the configuration of area ident.
+
+    Calls create() to create the value when it is not cached. The value is
+    cached until the configuration of the area changes.
+    """
+    cache_key = versioned_key(CONFIGURATION_VERSION_KEY % ident, name)
+    value = cache.get(cache_key)
+    if value is None:
+        value = create()
+        if value is not None:
+            cache.set(cache_key, value)
+    return value
@@ -1,12 +1,14 @@
 """
 API views not coupled to models.
 """
+import datetime
 import os
 
 from django.contrib.gis.geos import MultiPolygon
 from django.contrib.gis.geos import Polygon
 from django.contrib.gis.geos.point import Point
 
+from lizard_wbconfiguration.api.views import related_field_names
 from lizard_wbconfiguration.models import AreaConfiguration
 from lizard_wbconfiguration.models import BucketsType
 from lizard_wbconfiguration.models import Bucket
@@ -24,6 +26,23 @@ import pkg_resources
 
 import logging
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def with_related(area_objects):
+    """Return the area objects with the related objects the export reads.
+
+    The area of a bucket or structure is exported as the ident of the Area
+    of its area configuration.
+    """
+    related_names = related_field_names(area_objects.model)
+    if 'area' in related_names and area_objects.model != AreaConfiguration:
+        related_names.append('area__area')
+    return area_objects.select_related(*related_names)
+
 
 class DBFExporter(object):
     """
@@ -44,6 +63,7 @@ class DBFExporter(object):
         else:
             areas = Area.objects.exclude(data_set=None)
         areas = areas.exclude(area_class=Area.AREA_CLASS_KRW_WATERLICHAAM)
+        areas = with_related(areas)
 
         success = self.create_dbf('area', areas, filepath)
         self.logger.debug("Status export areas is '%s' for %s to %s" % (
@@ -52,7 +72,8 @@ class DBFExporter(object):
     def export_areaconfiguration(self, owner, save_to, filename):
         """Export areaconfigurations into dbf."""
         filepath = self.file_path(save_to, filename)
-        area_configurations = AreaConfiguration.objects.filter(data_set=owner)
+        area_configurations = with_related(
+            AreaConfiguration.objects.filter(data_set=owner))
         success = self.create_dbf('areaconfiguration',
                                   area_configurations,
                                   filepath)
@@ -62,7 +83,8 @@ class DBFExporter(object):
     def export_bucketconfiguration(self, owner, save_to, filename):
         """Export buckets into dbf."""
         filepath = self.file_path(save_to, filename)
-        buckets = Bucket.objects.filter(data_set=owner, deleted=False)
+        buckets = with_related(
+            Bucket.objects.filter(data_set=owner, deleted=False))
         success = self.create_dbf('bucket', buckets, filepath)
         self.logger.debug("Status export buckets is '%s' for %s into %s" % (
                 success, owner.name, filepath))
@@ -70,7 +92,8 @@ class DBFExporter(object):
     def export_structureconfiguration(self, owner, save_to, filename):
         """Export structures into dbf."""
         filepath = self.file_path(save_to, filename)
-        structures = Structure.objects.filter(data_set=owner, deleted=False)
+        structures = with_related(
+            Structure.objects.filter(data_set=owner, deleted=False))
         success = self.create_dbf('structure', structures, filepath)
         self.logger.debug("Status export structure is '%s' for %s into %s" % (
                 success, owner.name, filepath))
@@ -97,12 +120,14 @@ class DBFExporter(object):
                                            [area_configuration],
                                            filename)
 
-            buckets = Bucket.objects.filter(area=area_configuration)
+            buckets = with_related(
+                Bucket.objects.filter(area=area_configuration))
             self.logger.debug("Export bucket.")
             filename = self.create_filename('bucket')
             is_created_2 = self.create_dbf('bucket', buckets, filename)
 
-            structures = Structure.objects.filter(area=area_configuration)
+            structures = with_related(
+                Structure.objects.filter(area=area_configuration))
             self.logger.debug("Export structure.")
             filename = self.create_filename('structure')
             is_created_3 = self.create_dbf('structure', structures, filename)
@@ -299,3 +324,157 @@ class WbExporterToDict(DBFExporter):
         # files. As the keys will be compared to the field names, we upper case
         # the keys explicitly.
         self.out.append(dict((k.upper(), v) for k, v in rec.items()))
+
+
+class WbExporterToNumpy(DBFExporter):
+    """Implements the export of a DBF to NumPy structured arrays.
+
+    The dtype of each column is derived from the type, length and decimals
+    of the WBConfigurationDBFMapping of the field:
+
+      - 'C' becomes a unicode string of dbffield_length characters;
+      - 'N' becomes a float64 when it has decimals, an int64 otherwise;
+      - 'L' becomes a bool;
+      - 'D' becomes a datetime64[D].
+
+    The arrays are masked arrays, a missing value is masked. The data
+    under the mask is NaN, 0, False and NaT respectively, so use the mask
+    and not the data to tell a missing value from a real zero.
+    array_to_dbf writes the masked values back as empty dbf fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        DBFExporter.__init__(self, *args, **kwargs)
+        if numpy is None:
+            raise ImportError("WbExporterToNumpy requires numpy.")
+
+    def file_path(self, save_to, filename):
+        return "don't care"
+
+    def create_out(self, file_path):
+        self.columns = []
+        self.rows = []
+        self.masks = []
+        self.out = None
+
+    def add_field_out(self, field_options):
+        name, dbf_type = field_options[0].lower(), field_options[1].upper()
+        length = decimals = None
+        if len(field_options) > 2:
+            length = field_options[2]
+        if len(field_options) > 3:
+            decimals = field_options[3]
+        self.columns.append((name,) + self.column_type(
+            dbf_type, length, decimals))
+
+    def column_type(self, dbf_type, length, decimals):
+        """Return the (dtype, missing value, converter) of a dbf field."""
+        if dbf_type == 'N':
+            if decimals:
+                return ('f8', numpy.nan, float)
+            return ('i8', 0, int)
+        if dbf_type == 'L':
+            return ('?', False, bool)
+        if dbf_type == 'D':
+            return ('M8[D]', numpy.datetime64('NaT'), self.to_datetime64)
+        return ('U%d' % (length or 128), u'', unicode)
+
+    def to_datetime64(self, value):
+        if isinstance(value, datetime.datetime):
+            value = value.date()
+        return numpy.datetime64(value, 'D')
+
+    def new_record(self):
+        return {}
+
+    def store_record(self, rec):
+        row = []
+        mask = []
+        for name, dtype, missing, converter in self.columns:
+            value = rec.get(name)
+            if value is None:
+                row.append(missing)
+            else:
+                row.append(converter(value))
+            mask.append(value is None)
+        self.rows.append(tuple(row))
+        self.masks.append(tuple(mask))
+
+    def close_out(self):
+        dtype = [(str(name), dtype)
+                 for name, dtype, missing, converter in self.columns]
+        mask_dtype = [(name, '?') for name, column_dtype in dtype]
+        self.out = numpy.ma.array(
+            numpy.array(self.rows, dtype=dtype),
+            mask=numpy.array(self.masks, dtype=mask_dtype))
+        self.rows = []
+        self.masks = []
+
+    def to_array(self, model_name, area_objects):
+        """Return the area objects as structured array, None on error."""
+        if self.create_dbf(model_name, area_objects, None):
+            return self.out
+        return None
+
+    def array_to_dbf(self, model_name, array, filename):
+        """Write a structured array of to_array to a dbf file.
+
+        The masked values are left empty, as the dbf export does with
+        missing values.
+        """
+        mapping = WBConfigurationDBFMapping.objects.filter(
+            model_name__iexact=model_name).order_by('index')
+        data = numpy.ma.getdata(array)
+        mask = numpy.ma.getmaskarray(array)
+        writer = DBFExporter(self.logger)
+        writer.create_out(filename)
+        writer.fields_to_dbf(mapping)
+        for row, row_mask in zip(data, mask):
+            rec = writer.new_record()
+            for name in data.dtype.names:
+                if not row_mask[name]:
+                    rec[name] = row[name].item()
+            writer.store_record(rec)
+        writer.close_out()
+
+    def export_configuration_to_arrays(self, data_set=None):
+        """Return a dict of structured arrays, one per model.
+
+        Arguments:
+        data_set -- instance of DataSet to export, None for all data sets
+        """
+        area_configurations = AreaConfiguration.objects.all()
+        buckets = Bucket.objects.filter(deleted=False)
+        structures = Structure.objects.filter(deleted=False)
+        if data_set is not None:
+            area_configurations = area_configurations.filter(
+                data_set=data_set)
+            buckets = buckets.filter(data_set=data_set)
+            structures = structures.filter(data_set=data_set)
+        return {
+            'areaconfiguration': self.to_array(
+                'areaconfiguration', area_configurations.select_related(
+                    'area', 'data_set')),
+            'bucket': self.to_array(
+                'bucket', buckets.select_related(
+                    'area__area', 'bucket_type', 'data_set')),
+            'structure': self.to_array(
+                'structure', structures.select_related(
+                    'area__area', 'in_out', 'data_set')),
+            }
+
+    def export_configuration_to_npz(self, filepath, data_set=None):
+        """Export the configurations into a single .npz file."""
+        arrays = self.export_configuration_to_arrays(data_set)
+        failed = [name for name, array in arrays.items() if array is None]
+        if failed:
+            self.logger.error("Could not export %s to '%s'." % (
+                    ', '.join(failed), filepath))
+            return False
+        # savez drops the masks, store them next to the data.
+        data = {}
+        for name, array in arrays.items():
+            data[name] = numpy.ma.getdata(array)
+            data[name + '_mask'] = numpy.ma.getmaskarray(array)
+        numpy.savez(filepath, **data)
+        return True
@@ -3,19 +3,21 @@ Import WB configurations.
 """
 import logging
 
-from decimal import Decimal
 from dbfpy.dbf import Dbf
 
-from django.db.models.fields import DecimalField
+from django.db import transaction
 
 from lizard_wbconfiguration.api.views import WaterBalanceAreaConfiguration
 
 from lizard_wbconfiguration.models import AreaConfiguration
-from lizard_wbconfiguration.models import BucketsType
 from lizard_wbconfiguration.models import Bucket
 from lizard_wbconfiguration.models import Structure
-from lizard_wbconfiguration.models import StructureInOut
 from lizard_wbconfiguration.models import WBConfigurationDBFMapping
+from lizard_wbconfiguration.models import bulk_saves
+from lizard_wbconfiguration.models import forget_committed_configurations
+from lizard_wbconfiguration.schema import write_schema
+
+from lizard_security.models import DataSet
 
 
 class DBFImporter(object):
@@ -37,6 +39,12 @@ class DBFImporter(object):
         self.structures_failed = 0
         self.configurations_validated = 0
         self.configurations_failed = 0
+        # Related objects looked up during the import.
+        self.related_objects = {}
+        # Ids of the data sets of the imported objects.
+        self.data_set_ids = set()
+        # Idents of the areas of the objects imported by the running import.
+        self.area_idents = set()
         if logger is not None:
             self.logger = logger
         else:
@@ -62,6 +70,11 @@ class DBFImporter(object):
         self.import_buckets('Bucket')
         self.import_structures('Structure')
 
+    def imported_data_sets(self):
+        """Return the names of the data sets of the imported objects."""
+        return list(DataSet.objects.filter(
+                id__in=self.data_set_ids).values_list('name', flat=True))
+
     def _retrieve_importvalue(self, rec, mapping, model_object):
         """Retrieve a value from dbf record.
 
@@ -71,34 +84,48 @@ class DBFImporter(object):
         model_object -- instance of AreaConfigueration,
         Bucket or Structure object.
         """
+        schema = write_schema(model_object.__class__, 'dbf')
+        if not schema.accepts(mapping.wbfield_name):
+            self.logger.error("Field %s.%s cannot be imported." % (
+                    model_object._meta.module_name, mapping.wbfield_name))
+            return
         try:
             value = rec[mapping.dbffield_name]
-            model_field = model_object._meta.get_field_by_name(
-                mapping.wbfield_name)[0]
-            if isinstance(value, float) and isinstance(
-                model_field, DecimalField):
-                return Decimal(str(value))
-            if model_field.rel is not None:
-                if model_field.rel.to == BucketsType:
-                    bucket_types = BucketsType.objects.filter(
-                        code=value)
-                    if not bucket_types.exists():
-                        self.logger.error("BucketType %s not exists" % value)
-                        return
-                    return bucket_types[0]
-                elif model_field.rel.to == StructureInOut:
-                    structure_inout = StructureInOut.objects.filter(
-                        index=value)
-                    if not structure_inout.exists():
-                        self.logger.error("StructureInOut %s not exists" % (
-                                value))
-                        return
-                    return structure_inout[0]
-            return value
+            if value is None:
+                return
+            return schema.coerce(
+                mapping.wbfield_name, value, self.related_objects)
         except Exception as ex:
             self.logger.error(','.join(map(str, ex.args)))
 
+    def bulk_import(self, import_function, model_name, v_config):
+        """Run the import in one transaction, handling its saves at once.
+
+        The configurations of the imported areas are invalidated after the
+        commit.
+        """
+        self.area_idents = set()
+        with transaction.commit_on_success():
+            with bulk_saves():
+                status_tuple = import_function(model_name, v_config)
+        forget_committed_configurations(self.area_idents)
+        return status_tuple
+
     def import_buckets(self, model_name, v_config=None):
+        """Import buckets from dbf, see bulk_import."""
+        return self.bulk_import(self._import_buckets, model_name, v_config)
+
+    def import_structures(self, model_name, v_config=None):
+        """Import structures from dbf, see bulk_import."""
+        return self.bulk_import(self._import_structures, model_name,
+                                v_config)
+
+    def import_areaconfigurations(self, model_name, v_config=None):
+        """Import areaconfigurations from dbf, see bulk_import."""
+        return self.bulk_import(self._import_areaconfigurations, model_name,
+                                v_config)
+
+    def _import_buckets(self, model_name, v_config=None):
         """Import buckets from dbf.
         Omit not existing objects.
 
@@ -116,6 +143,8 @@ class DBFImporter(object):
             bucket = self._get_bucket(rec['GEBIED_GW'], rec['ID_GW'])
             if bucket is None:
                 continue
+            self.data_set_ids.add(bucket.data_set_id)
+            self.area_idents.add(bucket.area.ident)
             bucket.fews_meta_info = self.fews_meta_info
             for item in mapping:
                 if item.wbfield_name.lower() in self.read_only_fields:
@@ -147,7 +176,7 @@ class DBFImporter(object):
         db.close()
         return status_tuple
 
-    def import_structures(self, model_name, v_config=None):
+    def _import_structures(self, model_name, v_config=None):
         """Import structures from dbf.
         Omit not existing objects.
 
@@ -165,6 +194,8 @@ class DBFImporter(object):
             structure = self._get_structure(rec['GEBIED'], rec['ID'])
             if structure is None:
                 continue
+            self.data_set_ids.add(structure.data_set_id)
+            self.area_idents.add(structure.area.ident)
             for item in mapping:
                 if item.wbfield_name.lower() in self.read_only_fields:
                     self.logger.debug(
@@ -196,7 +227,7 @@ class DBFImporter(object):
         db.close()
         return status_tuple
 
-    def import_areaconfigurations(self, model_name, v_config=None):
+    def _import_areaconfigurations(self, model_name, v_config=None):
         """Import areaconfigurations from dbf.
         Omit not existing objects.
 
@@ -215,6 +246,8 @@ class DBFImporter(object):
             areaconfiguration = self._get_areaconfiguration(rec['GAFIDENT'])
             if areaconfiguration is None:
                 continue
+            self.data_set_ids.add(areaconfiguration.data_set_id)
+            self.area_idents.add(areaconfiguration.ident)
             for item in mapping:
                 if item.wbfield_name.lower() in self.read_only_fields:
                     self.logger.debug(
@@ -240,6 +273,7 @@ class DBFImporter(object):
             areaconfiguration.fews_meta_info = self.fews_meta_info
             areaconfiguration.lizard_history_summary = self.fews_meta_info
             areaconfiguration.save()
+            areaconfiguration.create_default_structures()
         db.close()
         return status_tuple
 
@@ -257,7 +291,7 @@ class DBFImporter(object):
 
         """
         try:
-            structure = Structure.objects.get(code=code)
+            structure = Structure.objects.select_related('area').get(code=code)
         except Structure.DoesNotExist:
             self.logger.debug(
                 "Structure with '%s' does NOT exist. Try to create one." % code)
@@ -288,7 +322,7 @@ class DBFImporter(object):
 
         """
         try:
-            bucket = Bucket.objects.get(code=code)
+            bucket = Bucket.objects.select_related('area').get(code=code)
         except Bucket.DoesNotExist:
             self.logger.debug(
                 "Bucket with '%s' does NOT exist. Try to create one." % code)
@@ -303,6 +337,10 @@ class DBFImporter(object):
                 data_set=area_config.data_set)
             bucket.lizard_history_summary = self.fews_meta_info
             bucket.save()
+            try:
+                area_config.claim_bucket_number(bucket.code_number())
+            except ValueError:
+                self.logger.warning("Bucket code '%s' has no number." % code)
         return bucket
 
     def _get_areaconfiguration(self, ident):
@@ -0,0 +1,166 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Per request timing and query counts of the api views.
+
+Set LIZARD_WBCONFIGURATION_INSTRUMENTATION = True to record for every
+request of an instrumented view the wall time, the time spent in the
+database, the number of queries and the size of the response, per endpoint
+and area ident. When the setting is off the views are not wrapped at all.
+
+Every request is logged to the 'lizard_wbconfiguration.instrumentation'
+logger as one line like:
+
+  endpoint=summary ident=2100 status=200 wall_ms=12.3 db_ms=4.5 queries=6
+  bytes=2048
+
+The last STATS_SAMPLES requests per endpoint are kept in the configuration
+cache, the api/stats/ endpoint shows their percentiles. The samples of an
+endpoint form a ring of STATS_SAMPLES keys, a request takes the next slot
+with an atomic cache.incr of the counter of the endpoint, so concurrent
+requests do not overwrite each other's samples. The size of a streamed
+response is not known, its wall time excludes the streaming.
+"""
+import time
+
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+from lizard_wbconfiguration.caching import cache
+
+import logging
+logger = logging.getLogger(__name__)
+
+STATS_SAMPLES = 1000
+STATS_TIMEOUT = 60 * 60 * 24
+STATS_COUNTER_KEY = 'lizard_wbconfiguration.stats.%s.counter'
+STATS_SLOT_KEY = 'lizard_wbconfiguration.stats.%s.%d'
+STATS_ENDPOINTS_KEY = 'lizard_wbconfiguration.stats.endpoints'
+PERCENTILES = (50, 90, 99)
+MEASURES = ('wall_ms', 'db_ms', 'queries', 'bytes')
+
+LOG_FORMAT = ("endpoint=%(endpoint)s ident=%(ident)s status=%(status)d "
+              "wall_ms=%(wall_ms).1f db_ms=%(db_ms).1f queries=%(queries)d "
+              "bytes=%(bytes)s")
+
+
+def instrumentation_enabled():
+    return getattr(settings, 'LIZARD_WBCONFIGURATION_INSTRUMENTATION', False)
+
+
+def instrumented(view, endpoint):
+    """Return the view that records its requests under the endpoint name.
+
+    Returns the view itself when the instrumentation is off.
+    """
+    if not instrumentation_enabled():
+        return view
+
+    @wraps(view)
+    def instrumented_view(request, *args, **kwargs):
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        first_query = len(connection.queries)
+        start = time.time()
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            wall_ms = (time.time() - start) * 1000
+            connection.use_debug_cursor = use_debug_cursor
+        queries = connection.queries[first_query:]
+        sample = {
+            'endpoint': endpoint,
+            'ident': request.REQUEST.get('object_id', None),
+            'status': response.status_code,
+            'wall_ms': wall_ms,
+            'db_ms': sum(float(query['time']) for query in queries) * 1000,
+            'queries': len(queries),
+            'bytes': response_size(response),
+        }
+        logger.info(LOG_FORMAT, sample)
+        record_sample(sample)
+        return response
+    return instrumented_view
+
+
+def response_size(response):
+    """Return the size of the content, None for a streamed response."""
+    if getattr(response, '_base_content_is_iter', False):
+        return None
+    return len(response.content)
+
+
+def record_sample(sample):
+    """Keep the sample in the next slot of the ring of its endpoint."""
+    endpoint = sample['endpoint']
+    counter_key = STATS_COUNTER_KEY % endpoint
+    cache.add(counter_key, 0, STATS_TIMEOUT)
+    try:
+        count = cache.incr(counter_key)
+    except ValueError:
+        # The counter expired between the add and the incr.
+        cache.set(counter_key, 1, STATS_TIMEOUT)
+        count = 1
+    slot = (count - 1) % STATS_SAMPLES
+    cache.set(STATS_SLOT_KEY % (endpoint, slot), sample, STATS_TIMEOUT)
+    if slot == 0:
+        # Register the endpoint on its first sample, and again once per
+        # round of the ring in case a concurrent registration lost it.
+        endpoints = cache.get(STATS_ENDPOINTS_KEY) or []
+        if endpoint not in endpoints:
+            cache.set(STATS_ENDPOINTS_KEY, endpoints + [endpoint],
+                      STATS_TIMEOUT)
+
+
+def recorded_samples(endpoint):
+    """Return the samples in the ring of the endpoint."""
+    count = cache.get(STATS_COUNTER_KEY % endpoint) or 0
+    keys = [STATS_SLOT_KEY % (endpoint, slot)
+            for slot in range(min(count, STATS_SAMPLES))]
+    return cache.get_many(keys).values()
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of the sorted values."""
+    rank = max(int(round(percent / 100.0 * len(values))), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def summarize(samples):
+    """Return the count and the percentiles of every measure."""
+    summary = {'count': len(samples)}
+    for measure in MEASURES:
+        values = sorted(sample[measure] for sample in samples
+                        if sample[measure] is not None)
+        if not values:
+            continue
+        summary[measure] = dict(
+            [('p%d' % percent, percentile(values, percent))
+             for percent in PERCENTILES] + [('max', values[-1])])
+    return summary
+
+
+def stats(endpoint=None, ident=None, by_ident=False):
+    """Return the summaries of the recorded samples per endpoint.
+
+    Arguments:
+    endpoint -- the endpoint to summarize, None for all endpoints
+    ident -- the area ident to summarize, None for all areas
+    by_ident -- summarize per endpoint and area ident
+    """
+    if endpoint is None:
+        endpoints = cache.get(STATS_ENDPOINTS_KEY) or []
+    else:
+        endpoints = [endpoint]
+    groups = {}
+    for name in endpoints:
+        for sample in recorded_samples(name):
+            if ident is not None and sample['ident'] != ident:
+                continue
+            group = name
+            if by_ident:
+                group = "%s %s" % (name, sample['ident'])
+            groups.setdefault(group, []).append(sample)
+    return dict((group, summarize(samples))
+                for group, samples in groups.items())
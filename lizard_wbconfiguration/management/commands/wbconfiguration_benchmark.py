@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import simplejson as json
+
+from lizard_wbconfiguration.benchmark import Benchmark
+from lizard_wbconfiguration.benchmark import BenchmarkError
+from lizard_wbconfiguration.benchmark import benchmark_header
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the export, import, lookups and api on synthetic
+    configurations of one or more numbers of areas.
+
+    The synthetic configurations are rolled back after every scale. The
+    results are written as JSON, store them to compare versions.
+    """
+
+    help = ("Example: bin/django wbconfiguration_benchmark "\
+                "--scales=100,1000 --buckets=8 --output=0.5.6.json")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--scales',
+                    help='Comma separated numbers of synthetic areas.',
+                    type='str',
+                    default='100'),
+        make_option('--buckets',
+                    help='Number of buckets per area.',
+                    type='int',
+                    default=8),
+        make_option('--sample',
+                    help='Number of areas to validate and request.',
+                    type='int',
+                    default=10),
+        make_option('--output',
+                    help='File to write the results to, default stdout.',
+                    type='str',
+                    default=None))
+
+    @transaction.commit_manually
+    def handle(self, *args, **options):
+        report = benchmark_header()
+        report['scales'] = []
+        for scale in options['scales'].split(','):
+            number_of_areas = int(scale)
+            try:
+                results = Benchmark(number_of_areas, options['buckets'],
+                                    options['sample']).run()
+            except BenchmarkError as ex:
+                raise CommandError(str(ex))
+            finally:
+                transaction.rollback()
+            report['scales'].append({'areas': number_of_areas,
+                                     'buckets': options['buckets'],
+                                     'results': results})
+        output = json.dumps(report, indent=2)
+        if options['output'] is None:
+            self.stdout.write(output + "\n")
+        else:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+            self.stdout.write("Results written to %s.\n" % options['output'])
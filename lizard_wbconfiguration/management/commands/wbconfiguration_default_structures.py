@@ -0,0 +1,46 @@
+#!/usr/bin/python
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lizard_security.models import DataSet
+from lizard_wbconfiguration.models import AreaConfiguration
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Creates the missing default structures of all area configurations.
+    """
+
+    help = ("Example: bin/django wbconfiguration_default_structures "\
+                "--data_set=name")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--data_set',
+                    help='Name of the data set, default all data sets.',
+                    type='str',
+                    default=None),
+        make_option('--chunk_size',
+                    help='Number of area configurations per bulk insert.',
+                    type='int',
+                    default=500))
+
+    @transaction.commit_on_success
+    def handle(self, *args, **options):
+        data_set = None
+        if options['data_set']:
+            try:
+                data_set = DataSet.objects.get(name=options['data_set'])
+            except DataSet.DoesNotExist:
+                logger.error("Data set '%s' does not exist." % (
+                        options['data_set']))
+                return
+        created = AreaConfiguration.objects.create_default_structures(
+            data_set=data_set, chunk_size=options['chunk_size'])
+        logger.info("Created %d default structures." % created)
@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+
+import os
+import time
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lizard_wbconfiguration.models import AreaConfiguration
+from lizard_wbconfiguration.synthetic import SYNTHETIC_PREFIX
+from lizard_wbconfiguration.synthetic import create_synthetic_data_sets
+from lizard_wbconfiguration.synthetic import write_synthetic_delivery
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Creates data sets with synthetic areas, configurations, default
+    structures and buckets, and optionally their dbf delivery zips.
+    """
+
+    help = ("Example: bin/django wbconfiguration_synthetic --data_sets=5 "\
+                "--areas=1000 --buckets=8 --deliveries=/tmp/deliveries")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--data_sets',
+                    help='Number of data sets.',
+                    type='int',
+                    default=1),
+        make_option('--areas',
+                    help='Number of areas per data set.',
+                    type='int',
+                    default=100),
+        make_option('--buckets',
+                    help='Number of buckets per area.',
+                    type='int',
+                    default=8),
+        make_option('--prefix',
+                    help=('Prefix of the names of the data sets and areas, '
+                          'a prefix can be used once. Defaults to '
+                          '"%s" followed by the current time, so every '
+                          'run creates new data sets.' % SYNTHETIC_PREFIX),
+                    type='str',
+                    default=None),
+        make_option('--deliveries',
+                    help='Directory to write a delivery zip per data set.',
+                    type='str',
+                    default=None))
+
+    @transaction.commit_on_success
+    def handle(self, *args, **options):
+        deliveries = options['deliveries']
+        if deliveries is not None and not os.path.isdir(deliveries):
+            logger.error("Directory '%s' does not exist." % deliveries)
+            return
+        prefix = options['prefix']
+        if prefix is None:
+            prefix = "%s%s" % (SYNTHETIC_PREFIX, time.strftime('%Y%m%d%H%M%S'))
+        if AreaConfiguration.objects.filter(
+            ident__startswith="%s_" % prefix).exists():
+            logger.error("Areas with prefix '%s' already exist." % prefix)
+            return
+        start = time.time()
+        data_sets = create_synthetic_data_sets(
+            options['data_sets'], options['areas'], options['buckets'],
+            prefix)
+        self.stdout.write("Created %d data sets of %d areas in %.1f s.\n" % (
+                len(data_sets), options['areas'], time.time() - start))
+        if deliveries is not None:
+            for data_set, area_configurations in data_sets:
+                zip_file_path = write_synthetic_delivery(data_set, deliveries)
+                self.stdout.write("Wrote %s.\n" % zip_file_path)
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+
+import time
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from lizard_wbconfiguration.warmup import area_id_chunks
+from lizard_wbconfiguration.warmup import warm_areas
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Fills the configuration cache of all areas or the areas of a data set.
+    """
+
+    help = ("Example: bin/django wbconfiguration_warm_cache "\
+                "--data_set=name --parallel")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--data_set',
+                    help='Name of the data set, default all data sets.',
+                    type='str',
+                    default=None),
+        make_option('--chunk_size',
+                    help='Number of areas per chunk.',
+                    type='int',
+                    default=100),
+        make_option('--parallel',
+                    help='Warm the chunks in celery subtasks.',
+                    action='store_true',
+                    default=False))
+
+    def handle(self, *args, **options):
+        start = time.time()
+        chunks = area_id_chunks(options['data_set'], options['chunk_size'])
+        if options['parallel']:
+            warmed = self.warm_parallel(chunks)
+        else:
+            warmed = 0
+            for chunk in chunks:
+                warmed += warm_areas(chunk)
+                self.stdout.write("%d areas warmed.\n" % warmed)
+        seconds = time.time() - start
+        self.stdout.write("Warmed %d areas in %.1f s (%.1f areas/s).\n" % (
+                warmed, seconds, warmed / max(seconds, 0.001)))
+
+    def warm_parallel(self, chunks):
+        """Warm the chunks in celery subtasks and wait for them."""
+        from celery.task.sets import TaskSet
+        from lizard_wbconfiguration.tasks import \
+            warm_wbconfiguration_cache_chunk
+        result = TaskSet(tasks=[
+                warm_wbconfiguration_cache_chunk.subtask((chunk, ))
+                for chunk in chunks]).apply_async()
+        return sum(result.join())
@@ -1,12 +1,30 @@
 # (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
 import logging
+import threading
+
+from contextlib import contextmanager
+
+from django.db import IntegrityError
 from django.db import models
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
 
 from lizard_area.models import Area
 
 from lizard_security.manager import FilteredManager
 from lizard_security.models import DataSet
 
+from lizard_wbconfiguration.caching import GRID_FIELDS_VERSION_KEY
+from lizard_wbconfiguration.caching import bump_configuration_version
+from lizard_wbconfiguration.caching import bump_configuration_versions
+from lizard_wbconfiguration.caching import bump_version
+from lizard_wbconfiguration.caching import cache
+from lizard_wbconfiguration.caching import versioned_key
+
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +56,39 @@ STRUCTURE_IN_OUT = (
     ('uit', 'Uit')
 )
 
+DEFAULT_STRUCTURES_CACHE_KEY = 'lizard_wbconfiguration.default_structures.%s'
+
+
+def parse_timeseries_reference(value):
+    """Return (location, parameter, timeseries id) of a ts_* value.
+
+    A ts_* value is formatted as '101.1,ALMR110,1514'. Returns None when the
+    value is empty or not formatted like that.
+    """
+    if not value:
+        return None
+    parts = value.split(',')
+    if len(parts) != 3:
+        return None
+    location, parameter, timeseries_id = [part.strip() for part in parts]
+    try:
+        timeseries_id = int(timeseries_id)
+    except ValueError:
+        return None
+    return (location, parameter, timeseries_id)
+
+
+def structure_in_out_types():
+    """Return a dict of the in and out StructureInOut by code."""
+    in_out_types = dict(
+        (in_out.code, in_out) for in_out in
+        StructureInOut.objects.filter(code__in=('in', 'uit')))
+    for code in ('in', 'uit'):
+        if code not in in_out_types:
+            raise StructureInOut.DoesNotExist(
+                "StructureInOut '%s' does not exist." % code)
+    return in_out_types
+
 
 class WBConfigurationDBFMapping(models.Model):
     model_name = models.CharField(max_length=128, choices=WB_DBF_MODELS)
@@ -117,6 +168,89 @@ class AreaGridFieldConfiguration(models.Model):
     def __unicode__(self):
         return "%s %s" % (self.grid, self.field_name)
 
+    @classmethod
+    def field_specs(cls, grid_name, model):
+        """Return the configured fields of the grid for the model.
+
+        Returns a list of (field name, spec) in the order of the model
+        fields, where spec is a dict with the display name, editable,
+        visible, ts_parameter, type and sequence of the field. The list is
+        cached until a grid configuration changes.
+        """
+        cache_key = versioned_key(GRID_FIELDS_VERSION_KEY,
+                                  model._meta.module_name,
+                                  str(grid_name).lower())
+        specs = cache.get(cache_key)
+        if specs is not None:
+            return specs
+
+        grid_fields = {}
+        for grid_field in cls.objects.filter(
+            grid__name__iexact=grid_name).select_related(
+            'field_name').order_by('-id'):
+            grid_fields[grid_field.field_name.field_name] = {
+                'property': grid_field.display_name,
+                'editable': grid_field.editable,
+                'visible': grid_field.visible,
+                'ts_parameter': grid_field.ts_parameter,
+                'type': grid_field.field_type,
+                'sequence': grid_field.sequence}
+        specs = [(field.name, grid_fields[field.name])
+                 for field in model._meta.fields
+                 if field.name in grid_fields]
+        cache.set(cache_key, specs)
+        return specs
+
+
+class AreaConfigurationManager(FilteredManager):
+
+    def create_default_structures(self, data_set=None, chunk_size=500):
+        """Create the missing default structures of all area configurations.
+
+        Per chunk of area configurations, retrieves the existing codes in
+        one query and inserts the missing structures in one bulk insert.
+        Returns the number of created structures.
+        """
+        area_configurations = self.get_query_set().order_by('id')
+        if data_set is not None:
+            area_configurations = area_configurations.filter(
+                data_set=data_set)
+        in_out_types = structure_in_out_types()
+        created = 0
+        last_id = 0
+        while True:
+            chunk = list(area_configurations.filter(id__gt=last_id)[
+                    :chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            existing_codes = dict((area_configuration.id, set())
+                                  for area_configuration in chunk)
+            for area_id, code in Structure.objects.filter(
+                area__in=existing_codes.keys()).values_list('area', 'code'):
+                existing_codes[area_id].add(code)
+            structures = []
+            provisioned = []
+            for area_configuration in chunk:
+                missing = area_configuration.missing_default_structures(
+                    existing_codes[area_configuration.id], in_out_types)
+                if missing:
+                    structures.extend(missing)
+                    provisioned.append(area_configuration)
+            Structure.objects.bulk_create(structures)
+            bump_configuration_versions([
+                    area_configuration.ident
+                    for area_configuration in provisioned])
+            forget_snapshots([area_configuration.id
+                              for area_configuration in provisioned])
+            cache.set_many(dict(
+                    (DEFAULT_STRUCTURES_CACHE_KEY % area_id, True)
+                    for area_id in existing_codes))
+            created += len(structures)
+            logger.debug("Created %d default structures for %d areas.",
+                         len(structures), len(provisioned))
+        return created
+
 
 class AreaConfiguration(models.Model):
     """
@@ -241,11 +375,28 @@ class AreaConfiguration(models.Model):
         max_digits=20, decimal_places=5,
         null=True, blank=True)
     fews_meta_info = models.CharField(max_length=128, null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     supports_object_permissions = True
     data_set = models.ForeignKey(DataSet,
                                  null=True,
                                  blank=True)
-    objects = FilteredManager()
+    objects = AreaConfigurationManager()
+
+    def reserve_bucket_numbers(self, count):
+        """Reserve count bucket numbers, return the first one.
+
+        The counter of the BucketNumberSequence is incremented in a single
+        UPDATE, which locks the row until the end of the transaction, so
+        concurrent reservations never get the same numbers.
+        """
+        sequences = BucketNumberSequence.objects.for_area(self)
+        sequences.update(last_number=F('last_number') + count)
+        return sequences.values_list('last_number', flat=True)[0] - count + 1
+
+    def claim_bucket_number(self, number):
+        """Make sure number is never reserved, e.g. for imported buckets."""
+        BucketNumberSequence.objects.for_area(self).filter(
+            last_number__lt=number).update(last_number=number)
 
     @property
     def code_pbinlaat_structure(self):
@@ -255,87 +406,21 @@ class AreaConfiguration(models.Model):
     def code_pbuitlaat_structure(self):
         return "%s_uitlaatPB" % self.ident
 
-    @property
-    def has_pbinlaat_structure(self):
-        """Return true if area has inlaatPB structure."""
-        structures = Structure.objects.filter(
-            area=self, code=self.code_pbinlaat_structure)
-        if structures.exists():
-            return True
-        return False
-
-    @property
-    def has_pbuitlaat_structure(self):
-        """Return true if area has 'uitlaatPB' structure."""
-        structures = Structure.objects.filter(
-            area=self, code=self.code_pbuitlaat_structure)
-        if structures.exists():
-            return True
-        return False
-
     def code_inlaat_structure(self, number):
         return "%s_inlaat%d" % (self.ident, number)
 
     def code_uitlaat_structure(self, number):
         return "%s_uitlaat%d" % (self.ident, number)
 
-    def has_inlaat_structure(self, number):
-        """Return true if area has 'inlaat' structure of the passed number."""
-        try:
-            Structure.objects.get(
-                code=self.code_inlaat_structure(number))
-        except:
-            return False
-        return True
-
-    def has_uitlaat_structure(self, number):
-        """Return true if area has 'uitlaat' structure of the passed number."""
-        try:
-            Structure.objects.get(
-                code=self.code_uitlaat_structure(number))
-        except:
-            return False
-        return True
-
-    def create_inlaat_structure(self, number, in_type):
-        """Create 'inlaat' structure."""
-        structure = Structure(
-            code=self.code_inlaat_structure(number),
-            area=self,
-            in_out=in_type,
-            data_set=self.data_set)
-        structure.save()
-
-    def create_uitlaat_structure(self, number, out_type):
-        """Create 'uitlaat' structure."""
-        structure = Structure(
-            code=self.code_uitlaat_structure(number),
-            area=self,
-            in_out=out_type,
-            data_set=self.data_set)
-        structure.save()
-
-    def create_pbinlaat_structure(self, in_type):
-        """Create 'inlaatPB' structure."""
-        structure = Structure(
-            code=self.code_pbinlaat_structure,
-            area=self,
-            in_out=in_type,
-            name=in_type.description,
-            is_computed=True,
-            data_set=self.data_set)
-        structure.save()
-
-    def create_pbuitlaat_structure(self, out_type):
-        """Create 'uitlaatPB' structure."""
-        structure = Structure(
-            code=self.code_pbuitlaat_structure,
-            area=self,
-            in_out=out_type,
-            name=out_type.description,
-            is_computed=True,
-            data_set=self.data_set)
-        structure.save()
+    def default_structures(self):
+        """Return (code, in_out code, is_computed) of the default structures.
+        """
+        defaults = [(self.code_pbinlaat_structure, 'in', True),
+                    (self.code_pbuitlaat_structure, 'uit', True)]
+        for i in range(1, 5):
+            defaults.append((self.code_inlaat_structure(i), 'in', False))
+            defaults.append((self.code_uitlaat_structure(i), 'uit', False))
+        return defaults
 
     def create_default_structures(self):
         """Create 10 structures
@@ -348,19 +433,49 @@ class AreaConfiguration(models.Model):
            - <area_ident>_inlaat1
            - <area_ident>_inlaat2
            - <area_ident>_inlaat3
-           - <area_ident>_inlaat4"""
-        in_type = StructureInOut.objects.get(code='in')
-        out_type = StructureInOut.objects.get(code='uit')
-
-        if self.has_pbinlaat_structure == False:
-            self.create_pbinlaat_structure(in_type)
-        if self.has_pbuitlaat_structure == False:
-            self.create_pbuitlaat_structure(out_type)
-        for i in range(1, 5):
-            if self.has_inlaat_structure(i) == False:
-                self.create_inlaat_structure(i, in_type)
-            if self.has_uitlaat_structure(i) == False:
-                self.create_uitlaat_structure(i, out_type)
+           - <area_ident>_inlaat4
+
+        Retrieves the existing codes in one query and inserts the missing
+        structures in one bulk insert. The result is memoized per area. See
+        AreaConfigurationManager.create_default_structures to create them
+        for many areas.
+        """
+        cache_key = DEFAULT_STRUCTURES_CACHE_KEY % self.id
+        if cache.get(cache_key):
+            return
+
+        existing_codes = set(Structure.objects.filter(
+                area=self,
+                code__in=[code for code, in_out, is_computed
+                          in self.default_structures()]
+                ).values_list('code', flat=True))
+        structures = self.missing_default_structures(existing_codes)
+        if structures:
+            Structure.objects.bulk_create(structures)
+            bump_configuration_version(self.ident)
+            forget_snapshots([self.id])
+        cache.set(cache_key, True)
+
+    def missing_default_structures(self, existing_codes, in_out_types=None):
+        """Return the unsaved default structures not in existing_codes."""
+        missing = [default for default in self.default_structures()
+                   if default[0] not in existing_codes]
+        if not missing:
+            return []
+        if in_out_types is None:
+            in_out_types = structure_in_out_types()
+        structures = []
+        for code, in_out, is_computed in missing:
+            structure = Structure(
+                code=code,
+                area=self,
+                in_out=in_out_types[in_out],
+                is_computed=is_computed,
+                data_set_id=self.data_set_id)
+            if is_computed:
+                structure.name = in_out_types[in_out].description
+            structures.append(structure)
+        return structures
 
     def __unicode__(self):
         return "%s" % self.ident
@@ -382,7 +497,7 @@ class Structure(models.Model):
     # View whose data to store via lizard_history.
     HISTORY_DATA_VIEW = ('lizard_wbconfiguration.api.views.HistoryObjectView')
 
-    code = models.CharField(max_length=128)
+    code = models.CharField(max_length=128, db_index=True)
     name = models.CharField(max_length=128)
     area = models.ForeignKey(AreaConfiguration)
     y = models.DecimalField(max_digits=10, decimal_places=9,
@@ -421,6 +536,7 @@ class Structure(models.Model):
         null=True, blank=True)
     deleted = models.BooleanField(default=False)
     fews_meta_info = models.CharField(max_length=128, null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     supports_object_permissions = True
     data_set = models.ForeignKey(DataSet,
                                  null=True,
@@ -432,6 +548,7 @@ class Structure(models.Model):
 
     class Meta:
         ordering = ['id']
+        unique_together = (('area', 'code'),)
 
 
 class BucketsType(models.Model):
@@ -455,7 +572,7 @@ class Bucket(models.Model):
     CODE_DELIMETER = "_GW"
 
     name = models.CharField(max_length=128)
-    code = models.CharField(max_length=128)
+    code = models.CharField(max_length=128, db_index=True)
     bucket_type = models.ForeignKey(BucketsType, null=True, blank=True)
     area = models.ForeignKey(AreaConfiguration)
     y = models.DecimalField(max_digits=10, decimal_places=9,
@@ -583,6 +700,7 @@ class Bucket(models.Model):
                                                   null=True, blank=True)
     deleted = models.BooleanField(default=False)
     fews_meta_info = models.CharField(max_length=128, null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     supports_object_permissions = True
     data_set = models.ForeignKey(DataSet,
                                  null=True,
@@ -611,3 +729,309 @@ class Bucket(models.Model):
 
     class Meta:
         ordering = ['id']
+        unique_together = (('area', 'code'),)
+
+
+class ConfigurationSnapshot(models.Model):
+    """
+    Compiled configuration of an area, see lizard_wbconfiguration.snapshot.
+
+    Deleted on every change of the area configuration, its buckets or its
+    structures, and compiled again when it is read.
+    """
+    area = models.OneToOneField(AreaConfiguration, related_name='snapshot')
+    data = models.TextField()
+    created = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        return "%s" % self.area_id
+
+
+class BucketNumberSequenceManager(models.Manager):
+
+    def for_area(self, area_configuration):
+        """Return the sequence of the area configuration as a queryset.
+
+        A missing sequence is created, starting at the highest number of
+        the bucket codes of the area.
+        """
+        sequences = self.get_query_set().filter(area=area_configuration)
+        if not sequences.exists():
+            last_number = 0
+            for bucket in Bucket.objects.filter(
+                area=area_configuration).only('code'):
+                try:
+                    last_number = max(last_number, bucket.code_number())
+                except ValueError:
+                    continue
+            sid = transaction.savepoint()
+            try:
+                self.create(area=area_configuration, last_number=last_number)
+                transaction.savepoint_commit(sid)
+            except IntegrityError:
+                # Created by another process meanwhile.
+                transaction.savepoint_rollback(sid)
+        return sequences
+
+
+class BucketNumberSequence(models.Model):
+    """
+    Highest number used in the code of a bucket of an area.
+
+    Kept out of AreaConfiguration so saving an area configuration never
+    writes back a number that has been reserved meanwhile.
+    """
+    area = models.OneToOneField(AreaConfiguration,
+                                related_name='bucket_number_sequence')
+    last_number = models.IntegerField(default=0)
+
+    objects = BucketNumberSequenceManager()
+
+    def __unicode__(self):
+        return "%s %s" % (self.area_id, self.last_number)
+
+
+class TimeseriesReferenceManager(models.Manager):
+
+    def timeseries_ids(self, area_ids):
+        """Return a dict of the referenced timeseries ids per area id.
+
+        Retrieves the references of all areas in one query.
+        """
+        timeseries_ids = dict((area_id, set()) for area_id in area_ids)
+        for area_id, timeseries_id in self.get_query_set().filter(
+            area__in=area_ids).values_list('area', 'timeseries_id'):
+            timeseries_ids[area_id].add(timeseries_id)
+        return timeseries_ids
+
+
+class TimeseriesReference(models.Model):
+    """
+    Parsed ts_* value of an area configuration, bucket or structure.
+
+    Kept up to date by the save and delete signals of these models, deleted
+    buckets and structures have no references.
+    """
+    area = models.ForeignKey(AreaConfiguration,
+                             related_name='timeseries_references')
+    object_type = models.CharField(max_length=32)
+    object_id = models.IntegerField()
+    field_name = models.CharField(max_length=64)
+    location = models.CharField(max_length=128)
+    parameter = models.CharField(max_length=128)
+    timeseries_id = models.IntegerField(db_index=True)
+
+    objects = TimeseriesReferenceManager()
+
+    class Meta:
+        unique_together = (('object_type', 'object_id', 'field_name'),)
+
+    def __unicode__(self):
+        return "%s,%s,%s" % (self.location, self.parameter,
+                             self.timeseries_id)
+
+
+def timeseries_references(area_object):
+    """Return the unsaved TimeseriesReferences of the area object."""
+    if isinstance(area_object, AreaConfiguration):
+        area_id = area_object.id
+    else:
+        area_id = area_object.area_id
+        if area_object.deleted:
+            return []
+    references = []
+    for field in area_object._meta.fields:
+        if not field.name.startswith('ts_'):
+            continue
+        value = getattr(area_object, field.attname)
+        reference = parse_timeseries_reference(value)
+        if reference is None:
+            if value:
+                logger.warning("Invalid timeseries '%s' in %s.%s of %s.",
+                               value, area_object._meta.module_name,
+                               field.name, area_object.id)
+            continue
+        location, parameter, timeseries_id = reference
+        references.append(TimeseriesReference(
+                area_id=area_id,
+                object_type=area_object._meta.module_name,
+                object_id=area_object.id,
+                field_name=field.name,
+                location=location,
+                parameter=parameter,
+                timeseries_id=timeseries_id))
+    return references
+
+
+def rebuild_timeseries_references(area_objects):
+    """Replace the references of the area objects with a few queries."""
+    object_ids = {}
+    for area_object in area_objects:
+        object_ids.setdefault(area_object._meta.module_name, []).append(
+            area_object.id)
+    for object_type, ids in object_ids.items():
+        TimeseriesReference.objects.filter(
+            object_type=object_type, object_id__in=ids).delete()
+    TimeseriesReference.objects.bulk_create(sum(
+            [timeseries_references(area_object)
+             for area_object in area_objects], []))
+
+
+BULK_SAVES = threading.local()
+
+
+def current_bulk_saves():
+    """Return the saves collected by the bulk_saves block, None outside."""
+    return getattr(BULK_SAVES, 'saves', None)
+
+
+@contextmanager
+def bulk_saves():
+    """Handle the saves of area objects in the block at once.
+
+    The references of the area objects saved in the block are rebuilt, the
+    snapshots of their areas deleted and the versions of their areas bumped
+    at the end of the block instead of on every save. Use it inside the
+    transaction of the saves and call forget_committed_configurations after
+    the commit, nested blocks are part of the outer block.
+    """
+    if current_bulk_saves() is not None:
+        yield current_bulk_saves()
+        return
+    saves = BULK_SAVES.saves = {'saved': {}, 'area_ids': set(),
+                                'idents': set()}
+    try:
+        yield saves
+    finally:
+        BULK_SAVES.saves = None
+    rebuild_timeseries_references(saves['saved'].values())
+    forget_snapshots(list(saves['area_ids']))
+    bump_configuration_versions(list(saves['idents']))
+
+
+def forget_snapshots(area_ids):
+    """Delete the compiled snapshots of the area configurations.
+
+    Within bulk_saves the snapshots are deleted at the end of the block.
+    """
+    saves = current_bulk_saves()
+    if saves is not None:
+        saves['area_ids'].update(area_ids)
+        return
+    if area_ids:
+        ConfigurationSnapshot.objects.filter(area__in=area_ids).delete()
+
+
+def forget_configuration_versions(idents):
+    """Invalidate everything cached for the configurations of the areas.
+
+    Within bulk_saves the versions are bumped at the end of the block.
+    """
+    saves = current_bulk_saves()
+    if saves is not None:
+        saves['idents'].update(idents)
+        return
+    bump_configuration_versions(idents)
+
+
+def forget_committed_configurations(idents):
+    """Invalidate the configurations of the areas after a commit.
+
+    The save signals invalidate them while the transaction is still open,
+    a request in between can cache or compile the old configuration under
+    the new version. Call this once the transaction is committed.
+    """
+    idents = [ident for ident in set(idents) if ident is not None]
+    if idents:
+        bump_configuration_versions(idents)
+        ConfigurationSnapshot.objects.filter(area__ident__in=idents).delete()
+
+
+@receiver(post_save, sender=AreaConfiguration)
+def provision_default_structures(sender, instance, created, raw=False,
+                                 **kwargs):
+    """Create the default structures of a new area configuration."""
+    if not created or raw:
+        return
+    try:
+        instance.create_default_structures()
+    except StructureInOut.DoesNotExist as ex:
+        logger.warning("No default structures for '%s': %s",
+                       instance.ident, ex)
+
+
+@receiver(post_save, sender=AreaConfiguration)
+@receiver(post_save, sender=Bucket)
+@receiver(post_save, sender=Structure)
+def remember_timeseries_references(sender, instance, raw=False, **kwargs):
+    """Replace the parsed ts_* values of the saved area object.
+
+    Within bulk_saves the references are replaced at the end of the block.
+    """
+    if raw:
+        return
+    saves = current_bulk_saves()
+    if saves is not None:
+        saves['saved'][(instance._meta.module_name, instance.id)] = instance
+        return
+    rebuild_timeseries_references([instance])
+
+
+@receiver(post_delete, sender=Bucket)
+@receiver(post_delete, sender=Structure)
+def forget_timeseries_references(sender, instance, **kwargs):
+    TimeseriesReference.objects.filter(
+        object_type=instance._meta.module_name,
+        object_id=instance.id).delete()
+
+
+@receiver(post_delete, sender=Structure)
+def forget_default_structures(sender, instance, **kwargs):
+    """Let the next create_default_structures check the area again."""
+    cache.delete(DEFAULT_STRUCTURES_CACHE_KEY % instance.area_id)
+
+
+@receiver(post_save, sender=AreaGridConfiguration)
+@receiver(post_delete, sender=AreaGridConfiguration)
+@receiver(post_save, sender=AreaField)
+@receiver(post_delete, sender=AreaField)
+@receiver(post_save, sender=AreaGridFieldConfiguration)
+@receiver(post_delete, sender=AreaGridFieldConfiguration)
+def forget_grid_fields(sender, **kwargs):
+    """Invalidate the cached field specs of all grids."""
+    bump_version(GRID_FIELDS_VERSION_KEY)
+
+
+@receiver(pre_save, sender=AreaConfiguration)
+@receiver(pre_save, sender=Bucket)
+@receiver(pre_save, sender=Structure)
+def forget_configuration_before_save(sender, instance, raw=False, **kwargs):
+    """Invalidate the configuration cached while the instance is saved.
+
+    The version is bumped again after the save, values cached by signal
+    handlers that run in between are not kept.
+    """
+    if raw:
+        return
+    if isinstance(instance, AreaConfiguration):
+        forget_configuration_versions([instance.ident])
+    else:
+        forget_configuration_versions([instance.area.ident])
+
+
+@receiver(post_save, sender=AreaConfiguration)
+@receiver(post_delete, sender=AreaConfiguration)
+def forget_configuration(sender, instance, **kwargs):
+    """Invalidate everything cached for the area configuration."""
+    forget_configuration_versions([instance.ident])
+    forget_snapshots([instance.id])
+
+
+@receiver(post_save, sender=Bucket)
+@receiver(post_delete, sender=Bucket)
+@receiver(post_save, sender=Structure)
+@receiver(post_delete, sender=Structure)
+def forget_area_configuration(sender, instance, **kwargs):
+    """Invalidate everything cached for the area of the bucket/structure."""
+    forget_configuration_versions([instance.area.ident])
+    forget_snapshots([instance.area_id])
@@ -0,0 +1,170 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Write schemas of the water balance configuration models.
+
+A write schema maps each field that may be written to a function that
+converts a submitted value into the value to store. The schemas are built
+once per model and source and shared by the API views and the DBF import.
+"""
+import datetime
+
+from decimal import Decimal
+from decimal import InvalidOperation
+from decimal import ROUND_HALF_UP
+
+from django.db.models.fields import BooleanField
+from django.db.models.fields import DateTimeField
+from django.db.models.fields import DecimalField
+from django.db.models.fields import IntegerField
+
+from lizard_wbconfiguration.models import BucketsType
+from lizard_wbconfiguration.models import StructureInOut
+
+DATE_FORMAT = "%d/%m/%Y"
+STARTSEASON_FORMAT = "%d/%m"
+
+# Field of the related object to look up by the submitted value, per source.
+RELATED_LOOKUPS = {
+    'api': {BucketsType: 'bucket_type', StructureInOut: 'code'},
+    'dbf': {BucketsType: 'code', StructureInOut: 'index'},
+}
+
+BOOLEAN_VALUES = {'true': True, 'false': False, '1': True, '0': False}
+
+WRITE_SCHEMAS = {}
+
+
+def write_schema(model, source='api'):
+    """Return the (cached) WriteSchema of the model for the source."""
+    key = (model, source)
+    if key not in WRITE_SCHEMAS:
+        WRITE_SCHEMAS[key] = WriteSchema(model, RELATED_LOOKUPS[source])
+    return WRITE_SCHEMAS[key]
+
+
+def coerce_boolean(value, related_objects):
+    if isinstance(value, (bool, int, long, Decimal, float)):
+        return bool(value)
+    try:
+        return BOOLEAN_VALUES[str(value).lower()]
+    except KeyError:
+        raise ValueError("'%s' is not a boolean." % value)
+
+
+def coerce_integer(value, related_objects):
+    return int(value)
+
+
+def coerce_text(value, related_objects):
+    if isinstance(value, basestring):
+        return value
+    return unicode(value)
+
+
+def decimal_coercer(field):
+    """Return a function to convert a value to a Decimal of the field.
+
+    The value is rounded to the decimal places of the field. A value with
+    more digits than the field can store is refused.
+    """
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+    max_value = Decimal(10) ** (field.max_digits - field.decimal_places)
+
+    def coerce_decimal(value, related_objects):
+        try:
+            value = Decimal(str(value)).quantize(exponent, ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError("'%s' is not a decimal." % value)
+        if abs(value) >= max_value:
+            raise ValueError("%s has more than %d digits." % (
+                    value, field.max_digits))
+        return value
+    return coerce_decimal
+
+
+def datetime_coercer(field):
+    """Return a function to convert a value to a datetime of the field.
+
+    Strings are formatted as '31/12/2012' for the start date and as '31/12'
+    for the start of a season, the current year is used for a season.
+    """
+    def coerce_datetime(value, related_objects):
+        if isinstance(value, datetime.datetime):
+            return value
+        if isinstance(value, datetime.date):
+            return datetime.datetime.combine(value, datetime.time())
+        if field.name != 'start_dt':
+            value = "%s/%s" % (value, datetime.date.today().year)
+        return datetime.datetime.strptime(value, DATE_FORMAT)
+    return coerce_datetime
+
+
+def related_coercer(related_model, lookup):
+    """Return a function to look up the related object of a value.
+
+    Lookups are memoized in the related_objects dict passed by the caller.
+    """
+    def coerce_related(value, related_objects):
+        if related_objects is None:
+            related_objects = {}
+        key = (related_model, lookup, value)
+        if key not in related_objects:
+            related = list(
+                related_model.objects.filter(**{lookup: value})[:1])
+            related_objects[key] = related[0] if related else None
+        if related_objects[key] is None:
+            raise ValueError("%s %s not exists" % (
+                    related_model._meta.object_name, value))
+        return related_objects[key]
+    return coerce_related
+
+
+class WriteSchema(object):
+    """
+    Fields of a model that may be written, with their coercion functions.
+
+    Primary keys, non-editable fields and foreign keys without a lookup
+    are read only.
+    """
+
+    def __init__(self, model, related_lookups):
+        self.model = model
+        self.coercers = {}
+        self.nullable = set()
+        self.read_only = set()
+        for field in model._meta.fields:
+            coercer = self.field_coercer(field, related_lookups)
+            if coercer is None:
+                self.read_only.add(field.name)
+                continue
+            self.coercers[field.name] = coercer
+            if field.null:
+                self.nullable.add(field.name)
+
+    def field_coercer(self, field, related_lookups):
+        if field.primary_key or not field.editable:
+            return None
+        if field.rel is not None:
+            if field.rel.to in related_lookups:
+                return related_coercer(field.rel.to,
+                                       related_lookups[field.rel.to])
+            return None
+        if isinstance(field, BooleanField):
+            return coerce_boolean
+        if isinstance(field, DecimalField):
+            return decimal_coercer(field)
+        if isinstance(field, DateTimeField):
+            return datetime_coercer(field)
+        if isinstance(field, IntegerField):
+            return coerce_integer
+        return coerce_text
+
+    def accepts(self, name):
+        return name in self.coercers
+
+    def coerce(self, name, value, related_objects=None):
+        """Return the value to store in field name.
+
+        Raises a ValueError when the value cannot be stored.
+        """
+        return self.coercers[name](value, related_objects)
@@ -0,0 +1,162 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Compiled snapshots of the water balance configuration of an area.
+
+A snapshot holds the area configuration and its buckets and structures
+that are not deleted, with decimals as floats and the ts_* fields parsed
+into [location, parameter, timeseries id]. It is stored as a
+ConfigurationSnapshot next to the area configuration, so a computation loads
+the configuration of an area with one query and without building model
+instances.
+
+The stored data is base64 of a 6-byte header, 'WBCS' and the format
+version as unsigned short, followed by the zlib compressed JSON.
+"""
+import base64
+import datetime
+import struct
+import zlib
+
+from decimal import Decimal
+
+from django.db import IntegrityError
+from django.db import transaction
+from django.utils import simplejson as json
+
+from lizard_wbconfiguration.caching import cached_configuration
+from lizard_wbconfiguration.models import AreaConfiguration
+from lizard_wbconfiguration.models import Bucket
+from lizard_wbconfiguration.models import ConfigurationSnapshot
+from lizard_wbconfiguration.models import Structure
+from lizard_wbconfiguration.models import parse_timeseries_reference
+from lizard_wbconfiguration.schema import RELATED_LOOKUPS
+
+import logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = 'WBCS'
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('>4sH')
+
+# Fields that are implied by the snapshot itself.
+SKIPPED_FIELDS = ('area', 'deleted')
+
+
+def snapshot_value(field, area_object):
+    """Return the value of the field as stored in a snapshot."""
+    if field.rel is not None:
+        lookup = RELATED_LOOKUPS['api'].get(field.rel.to)
+        if lookup is None:
+            return getattr(area_object, field.attname)
+        related = getattr(area_object, field.name)
+        if related is None:
+            return None
+        return getattr(related, lookup)
+    value = getattr(area_object, field.attname)
+    if field.name.startswith('ts_'):
+        return parse_timeseries_reference(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def snapshot_record(area_object):
+    return dict((field.name, snapshot_value(field, area_object))
+                for field in area_object._meta.fields
+                if field.name not in SKIPPED_FIELDS)
+
+
+def compile_snapshot(area_configuration):
+    """Return the snapshot of the area configuration as a dict."""
+    buckets = Bucket.objects.filter(
+        area=area_configuration, deleted=False).select_related('bucket_type')
+    structures = Structure.objects.filter(
+        area=area_configuration, deleted=False).select_related('in_out')
+    return {
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'ident': area_configuration.ident,
+        'area': snapshot_record(area_configuration),
+        'buckets': [snapshot_record(bucket) for bucket in buckets],
+        'structures': [snapshot_record(structure)
+                       for structure in structures],
+    }
+
+
+def dump_snapshot(snapshot):
+    """Return the snapshot dict as stored data."""
+    blob = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION)
+    blob += zlib.compress(json.dumps(snapshot, separators=(',', ':')))
+    return base64.b64encode(blob)
+
+
+def load_snapshot(data):
+    """Return the snapshot dict of stored data.
+
+    Raises a ValueError when the data is not a snapshot of the current
+    format version.
+    """
+    try:
+        blob = base64.b64decode(data)
+    except TypeError:
+        raise ValueError("Snapshot is not base64.")
+    if len(blob) < SNAPSHOT_HEADER.size:
+        raise ValueError("Snapshot has no header.")
+    magic, version = SNAPSHOT_HEADER.unpack_from(blob)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError("Snapshot format %s %s is not supported." % (
+                magic, version))
+    return json.loads(zlib.decompress(blob[SNAPSHOT_HEADER.size:]))
+
+
+def store_snapshot(area_configuration):
+    """Compile the snapshot of the area configuration and store it.
+
+    Returns the snapshot dict.
+    """
+    snapshot = compile_snapshot(area_configuration)
+    data = dump_snapshot(snapshot)
+    updated = ConfigurationSnapshot.objects.filter(
+        area=area_configuration).update(data=data)
+    if not updated:
+        sid = transaction.savepoint()
+        try:
+            ConfigurationSnapshot(area=area_configuration, data=data).save()
+            transaction.savepoint_commit(sid)
+        except IntegrityError:
+            # Stored by another process meanwhile.
+            transaction.savepoint_rollback(sid)
+    return snapshot
+
+
+def area_snapshot(ident):
+    """Return the snapshot dict of the area configuration with the ident.
+
+    The snapshot is cached until the configuration changes. Returns None
+    when the area configuration does not exist.
+    """
+    return cached_configuration(ident, 'snapshot',
+                                lambda: stored_snapshot(ident))
+
+
+def stored_snapshot(ident):
+    """Return the stored snapshot dict of the area configuration.
+
+    Reads the stored snapshot with one query, compiles and stores it when
+    it is missing or of an older format. Returns None when the area
+    configuration does not exist.
+    """
+    stored = list(ConfigurationSnapshot.objects.filter(
+            area__ident=ident).values_list('data', flat=True)[:1])
+    if stored:
+        try:
+            return load_snapshot(stored[0])
+        except ValueError as ex:
+            logger.info("Compiling snapshot of '%s' again: %s", ident, ex)
+    try:
+        area_configuration = AreaConfiguration.objects.get(ident=ident)
+    except AreaConfiguration.DoesNotExist:
+        logger.warning("AreaConfiguration '%s' does not exist.", ident)
+        return None
+    return store_snapshot(area_configuration)
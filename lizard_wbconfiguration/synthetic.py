@@ -0,0 +1,232 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Synthetic water balance configurations to benchmark with.
+
+The areas, configurations, buckets and structures are created the way the
+api and the importer create them, with idents starting with a prefix so they
+are easy to find and to remove.
+"""
+import os
+
+from decimal import Decimal
+from zipfile import ZipFile
+
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Polygon
+
+from lizard_area.models import Area
+from lizard_area.models import DataAdministrator
+from lizard_security.models import DataSet
+
+from lizard_wbconfiguration.caching import bump_configuration_versions
+from lizard_wbconfiguration.export_dbf import DBFExporter
+from lizard_wbconfiguration.models import AreaConfiguration
+from lizard_wbconfiguration.models import Bucket
+from lizard_wbconfiguration.models import BucketNumberSequence
+from lizard_wbconfiguration.models import Structure
+from lizard_wbconfiguration.models import StructureInOut
+from lizard_wbconfiguration.models import TimeseriesReference
+from lizard_wbconfiguration.models import WBConfigurationDBFMapping
+from lizard_wbconfiguration.models import timeseries_references
+
+import logging
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PREFIX = 'synthetic'
+
+# File names of the dbf files of a configuration delivery.
+DBF_FILENAMES = {
+    'AreaConfiguration': 'aanafvoer_waterbalans',
+    'Bucket': 'grondwatergebieden',
+    'Structure': 'pumpingstations',
+    'Area': 'aanafvoergebieden',
+}
+
+
+def synthetic_geo_object_group(prefix=SYNTHETIC_PREFIX):
+    from lizard_geo.models import GeoObjectGroup
+    user, created = User.objects.get_or_create(username=prefix)
+    geo_object_group, created = GeoObjectGroup.objects.get_or_create(
+        name=prefix, slug=prefix, created_by=user)
+    return geo_object_group
+
+
+def synthetic_geometry(number, size=0.01):
+    """Return a square polygon of the area with the given number."""
+    x0 = 4.0 + (number % 100) * size
+    y0 = 52.0 + (number // 100) * size
+    return Polygon(((x0, y0), (x0 + size, y0), (x0 + size, y0 + size),
+                    (x0, y0 + size), (x0, y0)), srid=4326)
+
+
+def create_structure_in_out():
+    """Create the in/out types the default structures need."""
+    StructureInOut.objects.get_or_create(
+        code='in', defaults={'index': 1, 'description': "In"})
+    StructureInOut.objects.get_or_create(
+        code='uit', defaults={'index': 0, 'description': "Uit"})
+
+
+def create_synthetic_areas(number_of_areas, data_set=None,
+                           prefix=SYNTHETIC_PREFIX, offset=0):
+    """Create areas, one by one as Area is an inherited model.
+
+    The polygon of an area is placed by its number plus the offset, so areas
+    created with different offsets do not overlap.
+    """
+    geo_object_group = synthetic_geo_object_group(prefix)
+    data_administrator, created = DataAdministrator.objects.get_or_create(
+        name=prefix)
+    areas = []
+    for number in range(number_of_areas):
+        area = Area(ident="%s_%d" % (prefix, number),
+                    name="%s %d" % (prefix, number),
+                    geo_object_group=geo_object_group,
+                    geometry=synthetic_geometry(offset + number),
+                    data_administrator=data_administrator,
+                    data_set=data_set)
+        area.save()
+        areas.append(area)
+    return areas
+
+
+def create_synthetic_configurations(number_of_areas, buckets_per_area=8,
+                                    data_set=None, prefix=SYNTHETIC_PREFIX,
+                                    offset=0):
+    """Create areas with a configuration, default structures and buckets.
+
+    Returns the area configurations.
+    """
+    create_structure_in_out()
+    areas = create_synthetic_areas(number_of_areas, data_set, prefix, offset)
+    AreaConfiguration.objects.bulk_create([
+            AreaConfiguration(ident=area.ident, name=area.name, area=area,
+                              data_set=data_set,
+                              surface=Decimal(1000 + number),
+                              kwel=Decimal('0.5'),
+                              wegz=Decimal('0.1'),
+                              ts_precipitation="%s,NEERSG,%d" % (
+                    area.ident, number))
+            for number, area in enumerate(areas)])
+    area_configurations = list(AreaConfiguration.objects.filter(
+            ident__in=[area.ident for area in areas]))
+    BucketNumberSequence.objects.bulk_create([
+            BucketNumberSequence(area=area_configuration,
+                                 last_number=buckets_per_area)
+            for area_configuration in area_configurations])
+    TimeseriesReference.objects.bulk_create(sum(
+            [timeseries_references(area_configuration)
+             for area_configuration in area_configurations], []))
+    if data_set is not None:
+        AreaConfiguration.objects.create_default_structures(data_set)
+    else:
+        for area_configuration in area_configurations:
+            area_configuration.create_default_structures()
+    Structure.objects.filter(area__in=area_configurations).update(
+        deb_zomer=Decimal('0.2'), deb_wint=Decimal('0.3'))
+    buckets = []
+    for area_configuration in area_configurations:
+        for number in range(1, buckets_per_area + 1):
+            bucket = Bucket(name="bucket %d" % number,
+                            area=area_configuration,
+                            data_set=data_set,
+                            surface=Decimal(100 * number),
+                            porosity=Decimal('0.3'),
+                            drainage_fraction=Decimal('0.5'))
+            bucket.code = bucket.create_code(number)
+            buckets.append(bucket)
+    Bucket.objects.bulk_create(buckets)
+    bump_configuration_versions([area_configuration.ident for
+                                 area_configuration in area_configurations])
+    logger.info("Created %d synthetic areas with %d buckets.",
+                len(area_configurations), len(buckets))
+    return area_configurations
+
+
+# (model name, wb field, dbf field, dbf type, length, decimals) of the
+# fields the dbf import needs and some configuration values.
+SYNTHETIC_DBF_MAPPING = (
+    ('AreaConfiguration', 'ident', 'GAFIDENT', 'C', 24, None),
+    ('AreaConfiguration', 'name', 'GAFNAAM', 'C', 100, None),
+    ('AreaConfiguration', 'surface', 'OPPERVL', 'N', 20, 5),
+    ('AreaConfiguration', 'kwel', 'KWEL', 'N', 20, 5),
+    ('AreaConfiguration', 'wegz', 'WEGZ', 'N', 20, 5),
+    ('AreaConfiguration', 'ts_precipitation', 'TS_NEERSL', 'C', 128, None),
+    ('Bucket', 'code', 'ID_GW', 'C', 50, None),
+    ('Bucket', 'area', 'GEBIED_GW', 'C', 24, None),
+    ('Bucket', 'name', 'NAAM', 'C', 100, None),
+    ('Bucket', 'surface', 'OPPERVL', 'N', 20, 5),
+    ('Bucket', 'porosity', 'POR_BOVEN', 'N', 20, 5),
+    ('Bucket', 'drainage_fraction', 'DRAIN_FR', 'N', 20, 5),
+    ('Structure', 'code', 'ID', 'C', 50, None),
+    ('Structure', 'area', 'GEBIED', 'C', 24, None),
+    ('Structure', 'name', 'NAAM', 'C', 100, None),
+    ('Structure', 'deb_zomer', 'DEB_ZOMER', 'N', 20, 5),
+    ('Structure', 'deb_wint', 'DEB_WINT', 'N', 20, 5),
+    ('Area', 'ident', 'GAFIDENT', 'C', 24, None),
+    ('Area', 'name', 'GAFNAAM', 'C', 100, None),
+)
+
+
+def create_synthetic_dbf_mapping():
+    """Create the dbf mapping of a model when it has none.
+
+    Returns the names of the models for which a mapping is created.
+    """
+    existing = set(WBConfigurationDBFMapping.objects.values_list(
+            'model_name', flat=True))
+    mappings = [
+        WBConfigurationDBFMapping(
+            model_name=model_name, wbfield_name=wbfield_name,
+            dbffield_name=dbffield_name, dbffield_type=dbffield_type,
+            dbffield_length=length, dbffield_decimals=decimals,
+            index=index)
+        for index, (model_name, wbfield_name, dbffield_name, dbffield_type,
+                    length, decimals) in enumerate(SYNTHETIC_DBF_MAPPING)
+        if model_name not in existing]
+    WBConfigurationDBFMapping.objects.bulk_create(mappings)
+    return sorted(set(mapping.model_name for mapping in mappings))
+
+
+def create_synthetic_data_sets(number_of_data_sets, areas_per_data_set,
+                               buckets_per_area=8, prefix=SYNTHETIC_PREFIX):
+    """Create data sets with synthetic configurations and the dbf mapping.
+
+    The data sets are named '<prefix>_<number>', the idents of their areas
+    start with that name. Returns a list of (data set, area configurations).
+    """
+    create_synthetic_dbf_mapping()
+    data_sets = []
+    for number in range(number_of_data_sets):
+        name = "%s_%d" % (prefix, number)
+        data_set, created = DataSet.objects.get_or_create(name=name)
+        area_configurations = create_synthetic_configurations(
+            areas_per_data_set, buckets_per_area, data_set, name,
+            offset=number * areas_per_data_set)
+        data_sets.append((data_set, area_configurations))
+    return data_sets
+
+
+def write_synthetic_delivery(data_set, directory):
+    """Export the configurations of the data set as a delivery zip.
+
+    The zip holds the dbf files of the areas, buckets and structures as a
+    configuration delivery does. Returns the path of the zip file.
+    """
+    exporter = DBFExporter(logger)
+    exports = (
+        ('AreaConfiguration', exporter.export_areaconfiguration),
+        ('Bucket', exporter.export_bucketconfiguration),
+        ('Structure', exporter.export_structureconfiguration))
+    zip_file_path = os.path.join(directory, "%s.zip" % data_set.name)
+    zip_file = ZipFile(zip_file_path, 'w')
+    try:
+        for model_name, export in exports:
+            export(data_set, directory, DBF_FILENAMES[model_name])
+            filename = "%s.dbf" % DBF_FILENAMES[model_name]
+            dbf_path = os.path.join(directory, filename)
+            zip_file.write(dbf_path, filename)
+            os.remove(dbf_path)
+    finally:
+        zip_file.close()
+    return zip_file_path
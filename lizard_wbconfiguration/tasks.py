@@ -9,6 +9,7 @@ import logging
 from zipfile import ZipFile
 
 from celery.task import task
+from celery.task.sets import TaskSet
 
 from lizard_portal.configurations_retriever import create_configurations_retriever
 from lizard_portal.models import ConfigurationToValidate
@@ -16,6 +17,8 @@ from lizard_portal.models import ConfigurationToValidate
 from lizard_wbconfiguration.import_dbf import DBFImporter
 from lizard_wbconfiguration.export_dbf import DBFExporter
 from lizard_wbconfiguration.models import DBFConfiguration
+from lizard_wbconfiguration.warmup import area_id_chunks
+from lizard_wbconfiguration.warmup import warm_areas
 
 from lizard_task.handler import get_handler
 from lizard_task.task import task_logging
@@ -63,6 +66,10 @@ def import_dbf(fews_meta_info=None,
         # End the fake request, so that lizard_history will log the changes
         utils.end_fake_request()
 
+    for data_set in dbfimporter.imported_data_sets():
+        warm_wbconfiguration_cache.delay(data_set=data_set,
+                                         taskname=taskname,
+                                         username=username)
     logger.removeHandler(handler)
     return "<<import dbf>>"
 
@@ -146,6 +153,10 @@ def validate_wbconfigurations(taskname="",
             logger.debug("Validated with ERRORS.")
     logger.info("Succeed=%s, Failed=%s." % (validated, failed))
     logger.info("End validation.")
+    if validated > 0:
+        warm_wbconfiguration_cache.delay(data_set=data_set,
+                                         taskname=taskname,
+                                         username=username)
 
 
 @task()
@@ -247,6 +258,35 @@ def export_aanafvoergebieden_to_dbf(
     logger.info("END EXPORT.")
 
 
+@task()
+def warm_wbconfiguration_cache_chunk(area_ids):
+    """Warm the configuration cache of the areas, return their number."""
+    return warm_areas(area_ids)
+
+
+@task()
+@task_logging
+def warm_wbconfiguration_cache(data_set=None,
+                               chunk_size=100,
+                               taskname="",
+                               username=None,
+                               levelno=20):
+    """
+    Warm the configuration cache of the areas in parallel chunks.
+
+    Arguments:
+    data_set -- name of organisation as DataSet in lizard_security, None
+    for all areas
+    chunk_size -- number of areas per subtask
+    """
+    logger = logging.getLogger(taskname)
+    chunks = area_id_chunks(data_set, chunk_size)
+    TaskSet(tasks=[warm_wbconfiguration_cache_chunk.subtask((chunk, ))
+                   for chunk in chunks]).apply_async()
+    logger.info("Warming the cache of %d areas in %d chunks." % (
+            sum(len(chunk) for chunk in chunks), len(chunks)))
+
+
 @task()
 def add():
     return "<<ADD task>>"
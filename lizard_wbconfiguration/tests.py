@@ -1,13 +1,70 @@
 # (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
 
+import datetime
+import os
+import shutil
+import tempfile
+
+from decimal import Decimal
+
 from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test.client import RequestFactory
+from django.utils import simplejson as json
+from django.utils import unittest
+from django.utils.importlib import import_module
 from lizard_area.models import Area
+from lizard_security.models import DataSet
+from lizard_wbconfiguration.api.views import CHANGE_TOKEN_FORMAT
+from lizard_wbconfiguration.api.views import CHANGE_TOKEN_MARGIN
+from lizard_wbconfiguration.api.views import HistoryObjectView
+from lizard_wbconfiguration.api.views import WBSummary
+from lizard_wbconfiguration.api.views import WaterBalanceAreaConfiguration
+from lizard_wbconfiguration.api.views import \
+    WaterBalanceAreaObjectConfiguration
+from lizard_wbconfiguration.api.views import WaterBalanceAreaConfigurations
+from lizard_wbconfiguration.api.views import WaterBalanceConfigurationImport
+from lizard_wbconfiguration.api.views import change_token
+from lizard_wbconfiguration.api.views import parse_change_token
+from lizard_wbconfiguration.benchmark import recorded_queries
+from lizard_wbconfiguration.caching import cache
+from lizard_wbconfiguration.caching import cached_configuration
+from lizard_wbconfiguration.caching import configuration_version
+from lizard_wbconfiguration.export_dbf import DBFExporter
+from lizard_wbconfiguration.export_dbf import WbExporterToNumpy
+from lizard_wbconfiguration.export_dbf import with_related
+from lizard_wbconfiguration.import_dbf import DBFImporter
+from lizard_wbconfiguration.instrumentation import STATS_SAMPLES
+from lizard_wbconfiguration.instrumentation import record_sample
+from lizard_wbconfiguration.instrumentation import stats
+from lizard_wbconfiguration.instrumentation import summarize
 from lizard_wbconfiguration.models import AreaConfiguration
+from lizard_wbconfiguration.models import Bucket
+from lizard_wbconfiguration.models import BucketsType
+from lizard_wbconfiguration.models import ConfigurationSnapshot
 from lizard_wbconfiguration.models import StructureInOut
 from lizard_wbconfiguration.models import Structure
+from lizard_wbconfiguration.models import TimeseriesReference
+from lizard_wbconfiguration.models import WBConfigurationDBFMapping
+from lizard_wbconfiguration.models import bulk_saves
+from lizard_wbconfiguration.models import parse_timeseries_reference
+from lizard_wbconfiguration.schema import write_schema
+from lizard_wbconfiguration.snapshot import dump_snapshot
+from lizard_wbconfiguration.snapshot import load_snapshot
+from lizard_wbconfiguration.synthetic import DBF_FILENAMES
+from lizard_wbconfiguration.synthetic import create_synthetic_configurations
+from lizard_wbconfiguration.synthetic import create_synthetic_dbf_mapping
 from django.contrib.auth.models import User
 from django.contrib.gis.geos import GEOSGeometry
 from django.contrib.gis.geos import Point
+from dbfpy.dbf import Dbf
+from south.orm import FakeORM
+from tls import TLSRequestMiddleware
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class StructureTest(TestCase):
@@ -56,6 +113,120 @@ class StructureTest(TestCase):
         structures = Structure.objects.all()
         self.assertEquals(len(structures), 10)
 
+    def test_create_missing_structures(self):
+        """Test creating of the missing default structures only."""
+        Structure(code=self.area_configuration.code_inlaat_structure(1),
+                  area=self.area_configuration).save()
+        self.area_configuration.create_default_structures()
+        structures = Structure.objects.filter(
+            code=self.area_configuration.code_inlaat_structure(1))
+        self.assertEquals(len(structures), 1)
+        self.assertEquals(len(Structure.objects.all()), 10)
+
+    def test_create_default_structures_of_all_areas(self):
+        """Test creating the missing structures of all areas at once."""
+        Structure(code=self.area_configuration.code_inlaat_structure(1),
+                  area=self.area_configuration).save()
+        self.assertEquals(
+            AreaConfiguration.objects.create_default_structures(), 9)
+        self.assertEquals(
+            AreaConfiguration.objects.create_default_structures(), 0)
+        self.assertEquals(len(Structure.objects.all()), 10)
+
+    def test_save_structure_changes_version(self):
+        """Test that saving a structure invalidates cached responses."""
+        version = configuration_version(self.area_configuration.ident)
+        Structure(code='test_1', area=self.area_configuration).save()
+        self.assertNotEquals(
+            configuration_version(self.area_configuration.ident), version)
+
+    def test_timeseries_references(self):
+        """Test that saved ts_* values are resolved per area."""
+        self.area_configuration.ts_kwel = "101.1,ALMR110,1514"
+        self.area_configuration.save()
+        bucket = Bucket(code='test_1', area=self.area_configuration,
+                        ts_flowoff="101.1,Q,7")
+        bucket.save()
+        area_id = self.area_configuration.id
+        self.assertEquals(
+            TimeseriesReference.objects.timeseries_ids([area_id]),
+            {area_id: set([1514, 7])})
+        bucket.delete()
+        self.assertEquals(
+            TimeseriesReference.objects.timeseries_ids([area_id]),
+            {area_id: set([1514])})
+
+    def test_timeseries_references_of_bulk_saves(self):
+        """Test that references are replaced at the end of bulk_saves."""
+        area_id = self.area_configuration.id
+        with bulk_saves():
+            for number in (1, 2):
+                Bucket(code='test_%d' % number, area=self.area_configuration,
+                       ts_flowoff="101.1,Q,%d" % number).save()
+            self.assertEquals(
+                TimeseriesReference.objects.timeseries_ids([area_id]),
+                {area_id: set()})
+        self.assertEquals(
+            TimeseriesReference.objects.timeseries_ids([area_id]),
+            {area_id: set([1, 2])})
+
+    def test_snapshots_of_bulk_saves(self):
+        """Test that the snapshot is deleted at the end of bulk_saves."""
+        snapshots = ConfigurationSnapshot.objects.filter(
+            area=self.area_configuration)
+        ConfigurationSnapshot(area=self.area_configuration, data='').save()
+        with bulk_saves():
+            for number in (1, 2):
+                Structure(code='test_%d' % number,
+                          area=self.area_configuration).save()
+            self.assertTrue(snapshots.exists())
+        self.assertFalse(snapshots.exists())
+
+    def test_summary_without_deleted_buckets(self):
+        """Test that the summary leaves out deleted buckets."""
+        Bucket(code='test_1', name='kept_bucket', surface=Decimal('100'),
+               area=self.area_configuration).save()
+        Bucket(code='test_2', name='removed_bucket', surface=Decimal('900'),
+               area=self.area_configuration, deleted=True).save()
+        summary = WBSummary().area_summary(self.area_configuration)
+        self.assertTrue('kept_bucket' in summary)
+        self.assertFalse('removed_bucket' in summary)
+        self.assertFalse('1000.' in summary)
+
+    def test_cached_configuration(self):
+        """Test that a cached configuration is created again on changes."""
+        created = []
+
+        def create():
+            created.append(True)
+            return len(created)
+
+        ident = self.area_configuration.ident
+        self.assertEquals(cached_configuration(ident, 'test', create), 1)
+        self.assertEquals(cached_configuration(ident, 'test', create), 1)
+        Structure(code='test_1', area=self.area_configuration).save()
+        self.assertEquals(cached_configuration(ident, 'test', create), 2)
+
+    def test_reserve_bucket_numbers(self):
+        """Test that reserved bucket numbers do not overlap."""
+        self.assertEquals(
+            self.area_configuration.reserve_bucket_numbers(3), 1)
+        self.assertEquals(
+            self.area_configuration.reserve_bucket_numbers(2), 4)
+        self.area_configuration.claim_bucket_number(10)
+        self.assertEquals(
+            self.area_configuration.reserve_bucket_numbers(1), 11)
+
+    def test_save_stale_area_configuration(self):
+        """Test that saving a stale instance keeps the reserved numbers."""
+        stale = AreaConfiguration.objects.get(id=self.area_configuration.id)
+        self.assertEquals(
+            self.area_configuration.reserve_bucket_numbers(3), 1)
+        stale.kwel = Decimal('0.5')
+        stale.save()
+        self.assertEquals(
+            self.area_configuration.reserve_bucket_numbers(1), 4)
+
     def get_or_create_geoobjectgroup(self, user_name):
         from lizard_geo.models import GeoObjectGroup
         user_obj = User.objects.get(username=user_name)
@@ -74,3 +245,560 @@ class StructureTest(TestCase):
             Area.objects.all().delete
         if self.area_configuration is not None:
             AreaConfiguration.objects.all().delete()
+
+
+class WriteSchemaTest(TestCase):
+
+    def setUp(self):
+        self.schema = write_schema(AreaConfiguration)
+
+    def test_read_only_fields(self):
+        """Test that id, area and modified cannot be written."""
+        for name in ('id', 'area', 'modified'):
+            self.assertFalse(self.schema.accepts(name))
+
+    def test_coerce_boolean(self):
+        self.assertEquals(self.schema.coerce('kwel_is_ts', 'false'), False)
+        self.assertEquals(self.schema.coerce('kwel_is_ts', 'True'), True)
+        self.assertRaises(ValueError, self.schema.coerce, 'kwel_is_ts', 'x')
+
+    def test_coerce_decimal(self):
+        """Test rounding to the decimal places and refusing overflows."""
+        self.assertEquals(self.schema.coerce('kwel', '1.123456'),
+                          Decimal('1.12346'))
+        self.assertRaises(ValueError, self.schema.coerce, 'x', '10.5')
+
+    def test_coerce_season(self):
+        value = self.schema.coerce('start_wp', '01/10')
+        self.assertEquals((value.day, value.month), (1, 10))
+
+
+class SnapshotTest(TestCase):
+
+    def test_dump_and_load(self):
+        snapshot = {'ident': 'test', 'area': {'kwel': 0.5},
+                    'buckets': [], 'structures': []}
+        self.assertEquals(load_snapshot(dump_snapshot(snapshot)), snapshot)
+
+    def test_load_invalid(self):
+        self.assertRaises(ValueError, load_snapshot, 'V0JDUwAC')
+
+    def test_parse_timeseries_reference(self):
+        self.assertEquals(parse_timeseries_reference("101.1,ALMR110,1514"),
+                          ('101.1', 'ALMR110', 1514))
+        self.assertEquals(parse_timeseries_reference("101.1"), None)
+
+
+class DuplicateCodeMigrationTest(TestCase):
+
+    def test_renumber_duplicate_codes(self):
+        """Test that migration 0037 renames a duplicate structure code."""
+        module = import_module(
+            'lizard_wbconfiguration.migrations.0037_auto__add_unique_'
+            'structure_area_code__add_unique_bucket_area_code')
+        migration = module.Migration()
+        orm = FakeORM(module.Migration, 'lizard_wbconfiguration')
+        area_configuration = create_synthetic_configurations(
+            1, 0, None, 'duplicate')[0]
+        migration.backwards(orm)
+        structure = Structure.objects.filter(area=area_configuration)[0]
+        original_id = structure.id
+        structure.id = None
+        structure.save()
+        migration.forwards(orm)
+        codes = list(Structure.objects.filter(
+                area=area_configuration).values_list('code', flat=True))
+        self.assertEquals(len(codes), len(set(codes)))
+        self.assertEquals(Structure.objects.get(
+                area=area_configuration, code=structure.code).id,
+                          original_id)
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class NumpyExportTest(TestCase):
+
+    def setUp(self):
+        create_synthetic_dbf_mapping()
+        WBConfigurationDBFMapping.objects.create(
+            model_name='Bucket', wbfield_name='bucket_type',
+            dbffield_name='TYPE', dbffield_type='N', dbffield_length=10,
+            index=100)
+        self.data_set = DataSet.objects.create(name='numpy')
+        create_synthetic_configurations(1, 3, self.data_set, 'numpy')
+        buckets = list(Bucket.objects.filter(data_set=self.data_set))
+        buckets[0].bucket_type = BucketsType.objects.create(
+            code=0, bucket_type='zero')
+        buckets[0].save()
+        buckets[1].surface = None
+        buckets[1].save()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def read_dbf(self, filepath):
+        dbf = Dbf(filepath, readOnly=True)
+        try:
+            return [record.asList() for record in dbf]
+        finally:
+            dbf.close()
+
+    def bucket_array(self):
+        return WbExporterToNumpy().to_array('bucket', with_related(
+                Bucket.objects.filter(data_set=self.data_set)))
+
+    def test_missing_values(self):
+        """Test that a missing value is masked, a real zero is not."""
+        array = self.bucket_array()
+        self.assertEquals(list(array['type'].mask), [False, True, True])
+        self.assertEquals(array['type'][0], 0)
+        self.assertEquals(list(array['oppervl'].mask), [False, True, False])
+
+    def test_dbf_as_export(self):
+        """Test that the array writes the dbf of the dbf export."""
+        DBFExporter().export_bucketconfiguration(
+            self.data_set, self.directory, 'export')
+        filepath = os.path.join(self.directory, 'array.dbf')
+        WbExporterToNumpy().array_to_dbf(
+            'bucket', self.bucket_array(), filepath)
+        self.assertEquals(
+            self.read_dbf(filepath),
+            self.read_dbf(os.path.join(self.directory, 'export.dbf')))
+
+
+class ConfigurationImportTest(TestCase):
+
+    def setUp(self):
+        self.data_set = DataSet.objects.create(name='ndjson')
+        create_synthetic_configurations(2, 1, self.data_set, 'ndjson')
+        self.user = User.objects.create(username='ndjson')
+
+    def post(self, lines):
+        request = RequestFactory().post(
+            '/', '\n'.join(json.dumps(line) for line in lines),
+            content_type='application/x-ndjson')
+        request.user = self.user
+        request.allowed_data_set_ids = [self.data_set.id]
+        request._dont_enforce_csrf_checks = True
+        response = WaterBalanceConfigurationImport.as_view()(request)
+        self.assertEquals(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_import_lines(self):
+        """Test that every line is imported with its own result."""
+        result = self.post([
+                {'ident': 'ndjson_0', 'area_configuration': {'kwel': '0.75'},
+                 'buckets': [{'surface': '5.0'}]},
+                {'ident': 'ndjson_1', 'structures': [
+                        {'code': 'ndjson_1_inlaat1', 'deb_zomer': '1.5'}]},
+                {'ident': 'unknown'}])
+        self.assertFalse(result['success'])
+        results = result['data']
+        self.assertEquals([area['ident'] for area in results],
+                          ['ndjson_0', 'ndjson_1', 'unknown'])
+        self.assertEquals(
+            [(area['success'], area.get('buckets'), area.get('structures'))
+             for area in results],
+            [(True, 1, 0), (True, 0, 1), (False, None, None)])
+        self.assertEquals(
+            AreaConfiguration.objects.get(ident='ndjson_0').kwel,
+            Decimal('0.75'))
+        self.assertEquals(
+            Bucket.objects.filter(area__ident='ndjson_0').count(), 2)
+        self.assertEquals(Structure.objects.get(
+                code='ndjson_1_inlaat1').deb_zomer, Decimal('1.5'))
+
+
+class AreaObjectChangesTest(TestCase):
+
+    def setUp(self):
+        self.data_set = DataSet.objects.create(name='changes')
+        create_synthetic_configurations(1, 3, self.data_set, 'changes')
+        self.user = User.objects.create(username='changes')
+        # Created an hour ago, so only the changes of the test are newer
+        # than the margin of a change token.
+        Bucket.objects.filter(data_set=self.data_set).update(
+            modified=datetime.datetime.now() - datetime.timedelta(hours=1))
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, **data):
+        data.update({'object_id': 'changes_0', 'area_object_type': 'Bucket'})
+        request = RequestFactory().get('/', data)
+        request.user = self.user
+        request.allowed_data_set_ids = [self.data_set.id]
+        response = WaterBalanceAreaObjectConfiguration.as_view()(request)
+        self.assertEquals(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_change_token(self):
+        """Test that a token goes back the margin in time."""
+        token = parse_change_token(change_token())
+        self.assertTrue(datetime.datetime.now() - token >= CHANGE_TOKEN_MARGIN)
+        self.assertEquals(parse_change_token('yesterday'), None)
+
+    def test_changes_since(self):
+        """Test that only the changed and deleted buckets are returned."""
+        two_hours_ago = (datetime.datetime.now() -
+                         datetime.timedelta(hours=2)).strftime(
+            CHANGE_TOKEN_FORMAT)
+        first = self.get(since=two_hours_ago)
+        self.assertEquals(len(first['data']), 3)
+        changed, deleted, unchanged = Bucket.objects.filter(
+            data_set=self.data_set)
+        changed.surface = Decimal('42')
+        changed.save()
+        deleted.deleted = True
+        deleted.save()
+        changes = self.get(since=first['version'])
+        self.assertEquals([row['id'] for row in changes['data']],
+                          [changed.id])
+        self.assertEquals(changes['deleted'], [deleted.id])
+        self.assertTrue(parse_change_token(changes['version']) is not None)
+
+    def test_invalid_since(self):
+        """Test that a malformed token returns all buckets."""
+        result = self.get(since='not a token')
+        self.assertEquals(len(result['data']), 3)
+        self.assertEquals(result['deleted'], [])
+        self.assertTrue(parse_change_token(result['version']) is not None)
+
+
+class AreaConfigurationsTest(TestCase):
+
+    def setUp(self):
+        self.data_sets = []
+        for name in ('bulk_a', 'bulk_b'):
+            data_set = DataSet.objects.create(name=name)
+            create_synthetic_configurations(3, 1, data_set, name)
+            self.data_sets.append(data_set)
+        self.user = User.objects.create(username='bulk')
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, data_sets, **data):
+        """Return the streamed areas, filtered as the middleware does."""
+        request = RequestFactory().get('/', data)
+        request.user = self.user
+        request.allowed_data_set_ids = [data_set.id for data_set in data_sets]
+        middleware = TLSRequestMiddleware()
+        middleware.process_request(request)
+        response = None
+        try:
+            response = WaterBalanceAreaConfigurations.as_view()(request)
+            self.assertEquals(response.status_code, 200)
+            content = response.content
+        finally:
+            middleware.process_response(request, response)
+        return json.loads(content)['data']
+
+    def idents(self, areas):
+        return sorted(area['ident'] for area in areas)
+
+    def test_data_set(self):
+        """Test that every area of the data set is streamed."""
+        areas = self.get(self.data_sets, data_set='bulk_a')
+        self.assertEquals(self.idents(areas),
+                          ['bulk_a_0', 'bulk_a_1', 'bulk_a_2'])
+        self.assertEquals([len(area['buckets']) for area in areas],
+                          [1, 1, 1])
+        self.assertEquals([len(area['structures']) for area in areas],
+                          [10, 10, 10])
+
+    def test_allowed_data_sets(self):
+        """Test that areas of other data sets are left out, also cached."""
+        object_ids = 'bulk_a_0,bulk_b_0'
+        self.assertEquals(
+            self.idents(self.get(self.data_sets, object_ids=object_ids)),
+            ['bulk_a_0', 'bulk_b_0'])
+        self.assertEquals(
+            self.idents(self.get(self.data_sets[:1], object_ids=object_ids)),
+            ['bulk_a_0'])
+
+
+class DuplicateCodeTest(TransactionTestCase):
+    """
+    Saving a duplicate code rolls back the request, so the transaction is
+    not the one of the test.
+    """
+
+    def setUp(self):
+        self.data_set = DataSet.objects.create(name='duplicate')
+        create_synthetic_configurations(1, 2, self.data_set, 'duplicate')
+        self.user = User.objects.create(username='duplicate')
+
+    def test_update_duplicate_code(self):
+        """Test that a duplicate bucket code is refused with a 409."""
+        first, second = Bucket.objects.filter(data_set=self.data_set)
+        request = RequestFactory().post(
+            '/?action=update', {
+                'object_id': 'duplicate_0', 'area_object_type': 'Bucket',
+                'data': json.dumps([{'id': second.id, 'code': first.code,
+                                     'surface': '5.0'}])})
+        request.user = self.user
+        request.allowed_data_set_ids = [self.data_set.id]
+        request._dont_enforce_csrf_checks = True
+        response = WaterBalanceAreaObjectConfiguration.as_view()(request)
+        self.assertEquals(response.status_code, 409)
+        self.assertFalse(json.loads(response.content)['success'])
+        second = Bucket.objects.get(id=second.id)
+        self.assertNotEquals(second.code, first.code)
+        self.assertNotEquals(second.surface, Decimal('5.0'))
+
+
+class InstrumentationTest(TestCase):
+
+    def test_summarize(self):
+        samples = [{'wall_ms': float(number), 'db_ms': 1.0, 'queries': 2,
+                    'bytes': None} for number in range(1, 101)]
+        summary = summarize(samples)
+        self.assertEquals(summary['count'], 100)
+        self.assertEquals(summary['wall_ms'],
+                          {'p50': 50.0, 'p90': 90.0, 'p99': 99.0,
+                           'max': 100.0})
+        self.assertEquals(summary['queries']['p99'], 2)
+        self.assertFalse('bytes' in summary)
+
+    def test_record_sample(self):
+        """Test that the ring keeps the last STATS_SAMPLES samples."""
+        cache.clear()
+        for number in range(STATS_SAMPLES + 10):
+            record_sample({'endpoint': 'ring', 'ident': None,
+                           'wall_ms': float(number), 'db_ms': 1.0,
+                           'queries': 2, 'bytes': None})
+        summary = stats()['ring']
+        self.assertEquals(summary['count'], STATS_SAMPLES)
+        self.assertEquals(summary['wall_ms']['max'], STATS_SAMPLES + 9.0)
+        cache.clear()
+
+
+class QueryBudgetTest(TestCase):
+    """
+    The number of queries of the api and the dbf import and export does
+    not grow with the number of areas and area objects.
+
+    Every budget runs on a small and a large data set of synthetic
+    configurations, with an empty cache. Reads and deletes have a fixed
+    number of queries, other writes a fixed number of queries per saved
+    object.
+    """
+
+    # (number of areas, buckets per area) of the small and the large data
+    # set.
+    sizes = ((2, 2), (4, 6))
+
+    def setUp(self):
+        create_synthetic_dbf_mapping()
+        self.fixtures = []
+        for number_of_areas, buckets_per_area in self.sizes:
+            prefix = 'budget%d' % number_of_areas
+            data_set = DataSet.objects.create(name=prefix)
+            area_configurations = create_synthetic_configurations(
+                number_of_areas, buckets_per_area, data_set, prefix)
+            self.fixtures.append((data_set, area_configurations))
+        self.user = User.objects.create(username='budget')
+        self.request_factory = RequestFactory()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        cache.clear()
+
+    def request(self, data_set, data, path='/', method='get'):
+        if method == 'get':
+            request = self.request_factory.get(path, data)
+        else:
+            request = self.request_factory.post(path, data)
+        request.user = self.user
+        request.allowed_data_set_ids = [data_set.id]
+        request._dont_enforce_csrf_checks = True
+        return request
+
+    def call(self, view_class, request, **initkwargs):
+        response = view_class.as_view(**initkwargs)(request)
+        self.assertEquals(response.status_code, 200)
+        response.content
+
+    def assertQueryBudget(self, name, prepare, per_object=False):
+        """Assert the queries of the large data set are within budget.
+
+        Arguments:
+        prepare -- called with a data set and its area configurations,
+        returns (function to measure, number of objects it handles)
+        per_object -- compare the number of queries per object
+        """
+        measurements = []
+        for data_set, area_configurations in self.fixtures:
+            function, number_of_objects = prepare(data_set,
+                                                  area_configurations)
+            cache.clear()
+            seconds, queries = recorded_queries(function)
+            measurements.append((number_of_objects, queries))
+        (small_objects, small), (large_objects, large) = measurements
+        if per_object:
+            within_budget = (len(large) * small_objects <=
+                             len(small) * large_objects)
+        else:
+            within_budget = len(large) <= len(small)
+        if not within_budget:
+            self.fail("%s: %d queries for %d objects, %d for %d:\n%s" % (
+                    name, len(small), small_objects, len(large),
+                    large_objects, "\n".join(large)))
+
+    def area_get(self, view_class, **data):
+        """Return a prepare of a GET of the view for the last area."""
+        def prepare(data_set, area_configurations):
+            ident = area_configurations[-1].ident
+            request = self.request(data_set, dict(data, object_id=ident))
+            return (lambda: self.call(view_class, request), 1)
+        return prepare
+
+    def bucket_post(self, action, record):
+        """Return a prepare of a POST of the action on the buckets."""
+        def prepare(data_set, area_configurations):
+            area_configuration = area_configurations[-1]
+            buckets = Bucket.objects.filter(area=area_configuration)
+            data = [record(bucket) for bucket in buckets]
+            request = self.request(
+                data_set, {'object_id': area_configuration.ident,
+                           'area_object_type': 'Bucket',
+                           'data': json.dumps(data)},
+                '/?action=%s' % action, 'post')
+            return (lambda: self.call(
+                    WaterBalanceAreaObjectConfiguration, request), len(data))
+        return prepare
+
+    def test_area_configuration(self):
+        for grid_name in ('water', 'area'):
+            self.assertQueryBudget(
+                'area_configuration', self.area_get(
+                    WaterBalanceAreaConfiguration, grid_name=grid_name))
+
+    def test_area_object_configuration(self):
+        for area_object_type in ('Bucket', 'Structure'):
+            self.assertQueryBudget(
+                'area_object_configuration', self.area_get(
+                    WaterBalanceAreaObjectConfiguration,
+                    area_object_type=area_object_type))
+
+    def test_summary(self):
+        self.assertQueryBudget('summary', self.area_get(WBSummary))
+
+    def test_area_configurations(self):
+        """Test the budget per chunk of two areas."""
+        def prepare(data_set, area_configurations):
+            request = self.request(data_set, {'data_set': data_set.name})
+            return (lambda: self.call(
+                    WaterBalanceAreaConfigurations, request, chunk_size=2),
+                    len(area_configurations) // 2)
+        self.assertQueryBudget('area_configurations', prepare,
+                               per_object=True)
+
+    def test_configuration_import(self):
+        """Test the budget per imported area, bucket and structure."""
+        def prepare(data_set, area_configurations):
+            lines = []
+            number_of_objects = 0
+            for area_configuration in area_configurations:
+                buckets = [{'code': bucket.code, 'surface': '42.0'}
+                           for bucket in Bucket.objects.filter(
+                        area=area_configuration)]
+                structures = [{'code': structure.code, 'deb_zomer': '1.5'}
+                              for structure in Structure.objects.filter(
+                        area=area_configuration)]
+                lines.append(json.dumps({
+                            'ident': area_configuration.ident,
+                            'area_configuration': {'kwel': '0.75'},
+                            'buckets': buckets, 'structures': structures}))
+                number_of_objects += 1 + len(buckets) + len(structures)
+            request = self.request_factory.post(
+                '/', '\n'.join(lines), content_type='application/x-ndjson')
+            request.user = self.user
+            request.allowed_data_set_ids = [data_set.id]
+            request._dont_enforce_csrf_checks = True
+            return (lambda: self.call(
+                    WaterBalanceConfigurationImport, request, chunk_size=2),
+                    number_of_objects)
+        self.assertQueryBudget('import_configurations', prepare,
+                               per_object=True)
+
+    def test_post_area_configuration(self):
+        def prepare(data_set, area_configurations):
+            request = self.request(
+                data_set, {'object_id': area_configurations[-1].ident,
+                           'data': json.dumps([{'id': 'kwel',
+                                                'value': '0.25'}])},
+                method='post')
+            return (lambda: self.call(WaterBalanceAreaConfiguration,
+                                      request), 1)
+        self.assertQueryBudget('area_configuration.post', prepare)
+
+    def test_post_create_buckets(self):
+        self.assertQueryBudget('area_object_configuration.create',
+                               self.bucket_post('create', lambda bucket: {
+                    'name': 'new', 'surface': '10.0'}), per_object=True)
+
+    def test_post_update_buckets(self):
+        self.assertQueryBudget('area_object_configuration.update',
+                               self.bucket_post('update', lambda bucket: {
+                    'id': bucket.id, 'surface': '42.0'}), per_object=True)
+
+    def test_post_delete_buckets(self):
+        self.assertQueryBudget('area_object_configuration.delete',
+                               self.bucket_post('delete', lambda bucket: {
+                    'id': bucket.id}))
+
+    def test_history(self):
+        def prepare(data_set, area_configurations):
+            area_configuration = area_configurations[-1]
+            return (lambda: HistoryObjectView().get_object_for_api(
+                    area_configuration, False, False), 1)
+        self.assertQueryBudget('history', prepare)
+
+    def test_export(self):
+        exporter = DBFExporter()
+        for model_name, export in (
+            ('AreaConfiguration', exporter.export_areaconfiguration),
+            ('Bucket', exporter.export_bucketconfiguration),
+            ('Structure', exporter.export_structureconfiguration),
+            ('Area', exporter.export_aanafvoergebieden)):
+
+            def prepare(data_set, area_configurations, export=export,
+                        model_name=model_name):
+                return (lambda: export(data_set, self.directory,
+                                       DBF_FILENAMES[model_name]), 1)
+            self.assertQueryBudget('export.%s' % model_name, prepare)
+
+    def test_import(self):
+        exporter = DBFExporter()
+        for model_name, export, import_name in (
+            ('AreaConfiguration', exporter.export_areaconfiguration,
+             'import_areaconfigurations'),
+            ('Bucket', exporter.export_bucketconfiguration,
+             'import_buckets'),
+            ('Structure', exporter.export_structureconfiguration,
+             'import_structures')):
+
+            def prepare(data_set, area_configurations, export=export,
+                        model_name=model_name, import_name=import_name):
+                filename = '%s_%s' % (data_set.name,
+                                      DBF_FILENAMES[model_name])
+                export(data_set, self.directory, filename)
+                importer = DBFImporter()
+                importer.fews_meta_info = 'budget'
+                filepath = '%s/%s.dbf' % (self.directory, filename)
+                importer.areas_filepath = filepath
+                importer.buckets_filepath = filepath
+                importer.structures_filepath = filepath
+                model = {'AreaConfiguration': AreaConfiguration,
+                         'Bucket': Bucket, 'Structure': Structure}[model_name]
+                area_objects = model.objects.filter(data_set=data_set)
+                if model != AreaConfiguration:
+                    area_objects = area_objects.filter(deleted=False)
+                number_of_objects = area_objects.count()
+                return (lambda: getattr(importer, import_name)(model_name),
+                        number_of_objects)
+            self.assertQueryBudget('import.%s' % model_name, prepare,
+                                   per_object=True)
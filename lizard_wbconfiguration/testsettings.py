@@ -38,6 +38,15 @@ DATABASES = {
         }
     }
 
+# The configurations are cached in LIZARD_WBCONFIGURATION_CACHE, use a
+# cache shared by all processes, like memcached, in a site.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+LIZARD_WBCONFIGURATION_CACHE = 'default'
+
 SITE_ID = 1
 INSTALLED_APPS = [
     'lizard_security',
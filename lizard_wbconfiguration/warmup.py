@@ -0,0 +1,101 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.txt.
+"""
+Fill the configuration cache after a deploy or an import.
+
+Caches the field specs of all grids and per area the snapshot, the
+configuration snapshot of the history, the rows of the area configuration,
+bucket and structure grids and the summary, so the first request of an
+area is not slow.
+"""
+import time
+
+from django.db.models import get_model
+
+from lizard_wbconfiguration.api.views import WBSummary
+from lizard_wbconfiguration.api.views import WaterBalanceAreaConfiguration
+from lizard_wbconfiguration.api.views import \
+    WaterBalanceAreaObjectConfiguration
+from lizard_wbconfiguration.api.views import cached_configuration_snapshot
+from lizard_wbconfiguration.api.views import related_field_names
+from lizard_wbconfiguration.models import AreaConfiguration
+from lizard_wbconfiguration.models import AreaGridConfiguration
+from lizard_wbconfiguration.models import AreaGridFieldConfiguration
+from lizard_wbconfiguration.models import Bucket
+from lizard_wbconfiguration.models import Structure
+from lizard_wbconfiguration.snapshot import area_snapshot
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def warm_grid_fields():
+    """Cache the field specs of all grids.
+
+    Returns the names of the grids per model, of the area configuration,
+    buckets and structures.
+    """
+    grid_names = dict((model, [])
+                      for model in (AreaConfiguration, Bucket, Structure))
+    for grid in AreaGridConfiguration.objects.all():
+        model = get_model(grid.app_name, grid.model_name)
+        if model is None:
+            logger.warning("Model %s.%s of grid '%s' does not exist.",
+                           grid.app_name, grid.model_name, grid.name)
+            continue
+        AreaGridFieldConfiguration.field_specs(grid.name, model)
+        if model in grid_names:
+            grid_names[model].append(grid.name)
+    return grid_names
+
+
+def warm_area(area_configuration, grid_names):
+    """Cache everything the api reads of the area configuration."""
+    area_snapshot(area_configuration.ident)
+    cached_configuration_snapshot(area_configuration)
+    grid_view = WaterBalanceAreaConfiguration()
+    for grid_name in grid_names[AreaConfiguration]:
+        grid_view.cached_area_configuration(area_configuration, grid_name)
+    object_view = WaterBalanceAreaObjectConfiguration()
+    for model in (Bucket, Structure):
+        projections = [None] + [
+            object_view.projected_field_names(model, grid_name=grid_name)
+            for grid_name in grid_names[model]]
+        for field_names in projections:
+            object_view.cached_areaobjects(
+                area_configuration.ident, model, field_names)
+    WBSummary().cached_summary(area_configuration)
+
+
+def warm_areas(area_ids):
+    """Warm the cache of the area configurations with the ids.
+
+    Returns the number of warmed area configurations.
+    """
+    start = time.time()
+    grid_names = warm_grid_fields()
+    warmed = 0
+    for area_configuration in AreaConfiguration.objects.filter(
+        id__in=area_ids).select_related(
+        *related_field_names(AreaConfiguration)):
+        warm_area(area_configuration, grid_names)
+        warmed += 1
+    seconds = time.time() - start
+    logger.info("Warmed %d areas in %.1f s (%.1f areas/s).", warmed,
+                seconds, warmed / max(seconds, 0.001))
+    return warmed
+
+
+def area_id_chunks(data_set=None, chunk_size=100):
+    """Return the ids of the area configurations in chunks.
+
+    Arguments:
+    data_set -- name of the DataSet, None for all area configurations
+    chunk_size -- number of area configurations per chunk
+    """
+    area_configurations = AreaConfiguration.objects.order_by('id')
+    if data_set is not None:
+        area_configurations = area_configurations.filter(
+            data_set__name__iexact=data_set)
+    area_ids = list(area_configurations.values_list('id', flat=True))
+    return [area_ids[start:start + chunk_size]
+            for start in range(0, len(area_ids), chunk_size)]
@@ -49,7 +49,8 @@ setup(name='lizard-wbconfiguration',
       zip_safe=False,
       install_requires=install_requires,
       tests_require=tests_require,
-      extras_require = {'test': tests_require},
+      extras_require = {'test': tests_require,
+                      'numpy': ['numpy']},
       entry_points={
           'console_scripts': [
           ]},